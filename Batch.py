@@ -0,0 +1,107 @@
+# Batch mode: runs many .bang files across a pool of worker processes, each of which imports the grammar and the backends
+# once, instead of starting one python process per file. Every file gets a fresh Interpreter, the results come out in the
+# order of the files as json lines:
+#   python Batch.py [--workers N] [--timeout SECONDS] 'scripts/**/*.bang' more.bang
+#   {"file": "scripts/a.bang", "result": 3, "seconds": 0.0004}
+#   {"file": "scripts/b.bang", "error": "Illegal callee: ...", "type": "Exception", "seconds": 0.0002}
+
+import argparse
+import glob
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator
+
+import Interpreter
+
+# set up once per worker by prepare
+_settings = None
+
+
+class Timeout(Exception):
+    pass
+
+def alarm(signum, frame):
+    raise Timeout()
+
+
+def prepare(lexer: str, evaluator: str, timeout: float | None, cache: bool):
+    """runs once in every worker: imports everything a script needs, the parser builds its grammar here."""
+    global _settings
+    import Parser
+    _settings = Interpreter.load(Interpreter.Lexers[lexer]), Parser.FileParser, Interpreter.load(Interpreter.Evaluators[evaluator]), timeout, cache
+    if timeout is not None:
+        signal.signal(signal.SIGALRM, alarm)
+
+
+def run_file(path: str) -> dict:
+    """runs the file at path in a fresh interpreter, its result or error as a json-able dict."""
+    import Evaluator
+    import Linker
+    from Consumers.Consumer import ConsumeError
+    lexer, parser, evaluator, timeout, cache = _settings
+    start = time.perf_counter()
+    line = { "file": path }
+    try:
+        if timeout is not None:
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        with open(path) as file:
+            source = file.read()
+        interpreter = Interpreter.Interpreter(lexer, parser, Linker.resolve, evaluator)
+        result = interpreter.interpret_file(path, source) if cache else interpreter.interpret(source)
+        match result:
+            case ConsumeError() as error:
+                line |= { "error": error.description, "type": "ConsumeError" }
+            case int() | float() | str() | bool() | None:
+                line["result"] = result
+            case _:
+                line["result"] = str(result) # functions hold frames and closures, neither json nor pickle take them
+    except Timeout:
+        line |= { "error": f"took longer than {timeout}s", "type": "Timeout" }
+    except Exception as error:
+        line |= { "error": str(error), "type": type(error).__name__ }
+    finally:
+        if timeout is not None:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        Evaluator.memo.clear() # scripts don't share anything
+    line["seconds"] = round(time.perf_counter() - start, 6)
+    return line
+
+
+def files(patterns: Iterable[str]) -> list[str]:
+    """the files matching the glob patterns, in order. a pattern that matches nothing is kept, so it shows up as an error."""
+    return [path for pattern in patterns for path in (sorted(glob.glob(pattern, recursive=True)) or [pattern])]
+
+
+def run(paths: list[str], workers: int | None = None, timeout: float | None = None, lexer: str = "compiled",
+        evaluator: str = "closure", cache: bool = True, chunksize: int = 8) -> Iterator[dict]:
+    """the result of every file, in order of paths, as soon as it and the ones before it are done."""
+    if timeout is not None and not hasattr(signal, "setitimer"):
+        raise Exception("timeouts need signal.setitimer, which this platform does not have")
+    with ProcessPoolExecutor(workers, initializer=prepare, initargs=(lexer, evaluator, timeout, cache)) as executor:
+        yield from executor.map(run_file, paths, chunksize=chunksize)
+
+
+def main():
+    arguments = argparse.ArgumentParser(description="Run many .bang files in a pool of worker processes, one json line per file.")
+    arguments.add_argument("files", nargs="+", help="files or glob patterns (quoted, ** matches directories)")
+    arguments.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes, one per core by default")
+    arguments.add_argument("--timeout", type=float, help="seconds a single file may run before it is stopped with an error")
+    arguments.add_argument("--lexer", choices=Interpreter.Lexers.keys(), default="compiled")
+    arguments.add_argument("--evaluator", choices=Interpreter.Evaluators.keys(), default="closure")
+    arguments.add_argument("--no-cache", action="store_true", help="neither read nor write the .bangc caches next to the files")
+    arguments.add_argument("--chunksize", type=int, default=8, help="files handed to a worker at once, larger is faster for many small files")
+    args = arguments.parse_args()
+
+    failed = False
+    for line in run(files(args.files), args.workers, args.timeout, args.lexer, args.evaluator, not args.no_cache, args.chunksize):
+        failed |= "error" in line
+        print(json.dumps(line), flush=True)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# Call heavy micro benchmark: every program spends nearly all of its time calling and returning from bang functions.
+# run from the repository root: python Benchmarks/Calls.py [repeats] [--memo]
+# the memo for pure functions is off unless --memo is given, it would skip most of the calls.
+
+import sys
+import time
+
+import ClosureCompiler
+import CompiledLexer
+import Evaluator
+import Linker
+import Parser
+import VM
+
+programs = {
+    "fib(20)": "fun fib(n) -> { if n < 2 return n return fib(n - 1) + fib(n - 2) } val r = fib(20)",
+    "add x 50000": "fun add(a, b) -> { return a + b } var i = 0 var s = 0 while i < 50000 { s = add(s, i) i = add(i, 1) }",
+    "nested returns x 20000": "fun f(a) -> { var b = a while b > 0 { if b < 3 { return b } b = b - 1 } return 0 } "
+                              "var i = 0 while i < 20000 { f(5) i = i + 1 }",
+    "tail calls x 50000": "fun sum(n, acc) -> { if n == 0 return acc return sum(n - 1, acc + n) } val r = sum(50000, 0)",
+}
+
+Evaluators = {
+    "tree": Evaluator.evaluate,
+    "closure": ClosureCompiler.evaluate,
+    "vm": VM.evaluate,
+}
+
+
+def link(source):
+    return Linker.resolve(Linker.global_scope(), Parser.FileParser(CompiledLexer.TokenLexer(source, 0).parsed, 0).parsed)
+
+
+def measure(evaluate, linked, repeats: int) -> float:
+    """the fastest of repeats runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        evaluate(Linker.global_frame(), linked)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    arguments = [argument for argument in sys.argv[1:] if argument != "--memo"]
+    repeats = int(arguments[0]) if arguments else 3
+    Evaluator.memo.enabled = "--memo" in sys.argv
+    width = max(len(name) for name in programs)
+    print(f"{'':<{width}}", *(f"{name:>9}" for name in Evaluators))
+    for name, source in programs.items():
+        linked = link(source)
+        print(f"{name:<{width}}", *(f"{measure(evaluate, linked, repeats):>8.3f}s" for evaluate in Evaluators.values()))
+
+
+if __name__ == "__main__":
+    main()
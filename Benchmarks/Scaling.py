@@ -0,0 +1,168 @@
+# Scaling benchmark: generated programs of growing size and different shapes, with the lexer, parser, linker and
+# evaluator timed (fastest of repeats) and their peak memory (tracemalloc) recorded separately.
+# run from the repository root:
+#   python Benchmarks/Scaling.py run [--out results.json] [--shapes loop,recursion] [--lexer ...] [--evaluator ...]
+#   python Benchmarks/Scaling.py compare before.json after.json [--threshold 0.1]
+# compare lists every phase that got slower or needed more memory than the threshold allows, and fails if there is one.
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import Evaluator
+import Interpreter
+import Linker
+import Parser
+
+
+def long_file(n: int) -> str:
+    """n declarations, each using the one before."""
+    return "val v0 = 0 " + " ".join(f"val v{i} = v{i - 1} * 2 + {i} - (v{i - 1} / 3)" for i in range(1, n))
+
+def nesting(n: int) -> str:
+    """one expression, parenthesized n deep."""
+    return "val r = " + "(" * n + "1" + " + 1)" * n
+
+def functions(n: int) -> str:
+    """n functions, each calling the one before."""
+    return "fun f0(a) -> { return a + 1 } " + " ".join(f"fun f{i}(a) -> {{ return f{i - 1}(a) + 1 }}" for i in range(1, n)) + f" val r = f{n - 1}(0)"
+
+def loop(n: int) -> str:
+    """a while loop running n times."""
+    return f"var i = 0 var s = 0 while i < {n} {{ if i % 3 == 0 s = s + i else s = s - 1 i = i + 1 }}"
+
+def recursion(n: int) -> str:
+    """fib(n), the memo is off while benchmarking."""
+    return f"fun fib(n) -> {{ if n < 2 return n return fib(n - 1) + fib(n - 2) }} val r = fib({n})"
+
+# the sizes stay below what the python recursion limit allows for the tree evaluator and the combinator parser.
+Shapes = {
+    "long file": (long_file, [100, 200, 400, 800]),
+    "nesting": (nesting, [8, 16, 32, 64]),
+    "functions": (functions, [25, 50, 100, 150]),
+    "loop": (loop, [1000, 5000, 25000]),
+    "recursion": (recursion, [10, 14, 18]),
+}
+
+Phases = ["lex", "parse", "link", "evaluate"]
+
+# phases faster or smaller than these are too noisy to compare
+TimeFloor = 0.001
+MemoryFloor = 64 * 1024
+
+
+def phases(lexer, evaluate):
+    """the phase functions, each takes the result of the one before."""
+    return {
+        "lex": lambda source: lexer(source, 0).parsed,
+        "parse": lambda tokens: Parser.FileParser(tokens, 0).parsed,
+        "link": lambda parsed: Linker.resolve(Linker.global_scope(), parsed),
+        "evaluate": lambda linked: evaluate(Linker.global_frame(), linked),
+    }
+
+def measure(phase, argument, repeats: int) -> tuple[dict, object]:
+    """the fastest time and the peak memory of phase(argument), and its result."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = phase(argument)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    phase(argument)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return { "seconds": best, "peak": peak }, result
+
+def benchmark(source: str, steps: dict, repeats: int) -> dict:
+    """every phase of source, a phase that fails ends the run with an error entry."""
+    result, argument = {}, source
+    for name, phase in steps.items():
+        try:
+            result[name], argument = measure(phase, argument, repeats)
+        except RecursionError:
+            result["error"] = f"RecursionError in {name}"
+            break
+    return result
+
+
+def run(args):
+    Evaluator.memo.enabled = False
+    steps = phases(Interpreter.load(Interpreter.Lexers[args.lexer]), Interpreter.load(Interpreter.Evaluators[args.evaluator]))
+    shapes = args.shapes.split(",") if args.shapes else list(Shapes)
+    results = {}
+    for shape in shapes:
+        generate, sizes = Shapes[shape]
+        for size in sizes:
+            key = f"{shape} {size}"
+            results[key] = benchmark(generate(size), steps, args.repeats)
+            print(f"{key:<16}", format_phases(results[key]), flush=True)
+    if args.out:
+        with open(args.out, "w") as file:
+            json.dump({
+                "python": platform.python_version(),
+                "lexer": args.lexer,
+                "evaluator": args.evaluator,
+                "repeats": args.repeats,
+                "results": results,
+            }, file, indent=2)
+
+def format_phases(result: dict) -> str:
+    timings = " ".join(f"{name} {result[name]['seconds'] * 1000:>8.2f}ms {result[name]['peak'] / 1024:>7.0f}K" for name in Phases if name in result)
+    return timings + (f"  {result['error']}" if "error" in result else "")
+
+
+def regressions(before: dict, after: dict, threshold: float) -> list[str]:
+    """a line for every phase that is slower or needs more memory than before by more than threshold (0.1 = 10%)."""
+    lines = []
+    for key, result in after["results"].items():
+        for name in Phases:
+            old, new = before["results"].get(key, {}).get(name), result.get(name)
+            if old is None or new is None:
+                continue
+            if max(old["seconds"], new["seconds"]) >= TimeFloor and new["seconds"] > old["seconds"] * (1 + threshold):
+                lines.append(f"{key:<16} {name:<8} time   {old['seconds'] * 1000:>9.2f}ms -> {new['seconds'] * 1000:>9.2f}ms  {new['seconds'] / old['seconds']:.2f}x")
+            if max(old["peak"], new["peak"]) >= MemoryFloor and new["peak"] > old["peak"] * (1 + threshold):
+                lines.append(f"{key:<16} {name:<8} memory {old['peak'] / 1024:>9.0f}K  -> {new['peak'] / 1024:>9.0f}K   {new['peak'] / max(old['peak'], 1):.2f}x")
+        if "error" in result and "error" not in before["results"].get(key, {"error": None}):
+            lines.append(f"{key:<16} {result['error']}")
+    return lines
+
+def compare(args):
+    with open(args.before) as file:
+        before = json.load(file)
+    with open(args.after) as file:
+        after = json.load(file)
+    for key, result in after["results"].items():
+        old = before["results"].get(key, {})
+        ratios = " ".join(f"{name} {result[name]['seconds'] / old[name]['seconds']:>5.2f}x" for name in Phases if name in result and name in old)
+        print(f"{key:<16} {ratios or 'not in both'}")
+    lines = regressions(before, after, args.threshold)
+    print(f"\n{len(lines)} regressions over {args.threshold:.0%}", *lines, sep="\n")
+    sys.exit(1 if lines else 0)
+
+
+def main():
+    arguments = argparse.ArgumentParser(description="Time the phases of the interpreter on generated programs.")
+    commands = arguments.add_subparsers(dest="command", required=True)
+    running = commands.add_parser("run", help="benchmark and print the results, --out also saves them as json")
+    running.add_argument("--out", help="where to save the results")
+    running.add_argument("--shapes", help=f"comma separated, of {', '.join(Shapes)}")
+    running.add_argument("--repeats", type=int, default=3)
+    running.add_argument("--lexer", choices=Interpreter.Lexers.keys(), default="combinator")
+    running.add_argument("--evaluator", choices=Interpreter.Evaluators.keys(), default="tree")
+    comparing = commands.add_parser("compare", help="compare two saved results")
+    comparing.add_argument("before")
+    comparing.add_argument("after")
+    comparing.add_argument("--threshold", type=float, default=0.1, help="how much slower or larger a phase may get, 0.1 = 10%%")
+    args = arguments.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        compare(args)
+
+
+if __name__ == "__main__":
+    main()
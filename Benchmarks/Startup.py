@@ -0,0 +1,59 @@
+# Startup benchmark: time to first result of short interpreter runs, each in a fresh python process.
+# run from the repository root: python Benchmarks/Startup.py [repeats] [--imports]
+# --imports also lists the modules that take longest to import (python -X importtime), the usual suspects for regressions.
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+Runs = {
+    "1+1": ["Interpreter.py", "1+1"],
+    "--help": ["Interpreter.py", "--help"],
+    "sample.bang": ["Interpreter.py", "sample.bang"], # from the .bangc cache after the first run
+    "sample.bang --no-cache": ["Interpreter.py", "--no-cache", "sample.bang"],
+}
+
+# timings in a process that writes no bytecode would include compiling every module again
+Environment = { name: value for name, value in os.environ.items() if name != "PYTHONDONTWRITEBYTECODE" }
+
+
+def measure(arguments: list[str], repeats: int) -> list[float]:
+    subprocess.run([sys.executable, *arguments], capture_output=True, env=Environment) # warm up, writes caches
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *arguments], capture_output=True, env=Environment)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def imports(arguments: list[str], count: int = 10) -> list[tuple[int, str]]:
+    """the count modules with the largest own import time in microseconds."""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", *arguments], capture_output=True, text=True, env=Environment).stderr
+    result = []
+    for line in stderr.splitlines():
+        match line.split("|"):
+            case [own, _, module] if own.startswith("import time:") and own[12:].strip().isdigit():
+                result.append((int(own[12:]), module.strip()))
+    return sorted(result, reverse=True)[:count]
+
+
+def main():
+    arguments = [argument for argument in sys.argv[1:] if argument != "--imports"]
+    repeats = int(arguments[0]) if arguments else 10
+    bare = statistics.median(measure(["-c", "pass"], repeats))
+    width = max(len(name) for name in Runs)
+    print(f"{'':<{width}}      min   median   (python itself: {bare * 1000:.0f}ms)")
+    for name, run in Runs.items():
+        times = measure(run, repeats)
+        print(f"{name:<{width}} {min(times) * 1000:>6.0f}ms {statistics.median(times) * 1000:>6.0f}ms")
+    if "--imports" in sys.argv:
+        print("\nslowest imports for 1+1:")
+        for own, module in imports(Runs["1+1"]):
+            print(f"{own / 1000:>6.1f}ms {module}")
+
+
+if __name__ == "__main__":
+    main()
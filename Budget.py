@@ -0,0 +1,87 @@
+# Execution budgets for scripts that must not hold a worker forever: a number of steps (loop iterations and calls),
+# a call depth and a rough cap on the memory the frames of the running script hold. The VM charges the budget every
+# few steps and raises BudgetExceeded once a script goes over, see VM.execute. Budgets add up over everything that
+# runs with them, an Interpreter with one (Interpreter(..., budget=Budget(...))) charges all of its scripts to it.
+
+import sys
+
+from Linker import FunctionCallable
+
+
+class BudgetExceeded(Exception):
+    """a script went over one of the limits of its budget. limit is "steps", "depth" or "memory",
+    used and remaining the statistics of all three at that point (remaining is None for the ones without a limit)."""
+    def __init__(self, limit: str, budget: "Budget"):
+        self.limit = limit
+        self.used = budget.used()
+        self.remaining = budget.remaining()
+        super().__init__(f"{limit} budget exceeded: {budget.report()}")
+
+
+def held(calls: list, frame: list) -> int:
+    """roughly the bytes held by the frames of the running code: the frames on the call stack, the ones around them,
+    the ones functions in them were declared in, and their values."""
+    seen, todo, total = set(), [frame, *(call[-1] for call in calls)], 0
+    while todo:
+        current = todo.pop()
+        if current is None or id(current) in seen:
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        todo.append(current[0])
+        for value in current[1:]:
+            if isinstance(value, FunctionCallable):
+                todo.append(value.frame)
+            else:
+                total += sys.getsizeof(value)
+    return total
+
+
+class Budget:
+    """steps: loop iterations and calls, depth: calls running at the same time, memory: bytes (see held). None is no limit.
+    steps and depth are exact, memory is looked at every interval steps."""
+    def __init__(self, steps: int | None = None, depth: int | None = None, memory: int | None = None, interval: int = 1000):
+        self.steps = steps
+        self.depth = depth
+        self.memory = memory
+        self.interval = interval
+        self.steps_used = 0
+        self.deepest = 0
+        self.memory_used = 0
+
+    def charge(self, steps: int, calls: list, frame: list, until: int) -> int:
+        """counts the steps that ran since the last charge and looks at the memory. returns when to charge next:
+        in until steps, or earlier where the steps run out. raises when the budget is exceeded."""
+        self.steps_used += steps
+        self.deepest = max(self.deepest, len(calls))
+        if self.memory is not None:
+            self.memory_used = held(calls, frame)
+            if self.memory_used > self.memory:
+                self.exceed("memory", 0, calls, frame)
+        if self.steps is None:
+            return until
+        if self.steps_used > self.steps: # the step that is about to run is already counted
+            self.exceed("steps", 0, calls, frame)
+        return min(until, self.steps - self.steps_used + 1)
+
+    def exceed(self, limit: str, steps: int, calls: list, frame: list):
+        """raises BudgetExceeded for limit with up to date statistics, steps are the ones that were not charged yet.
+        for "depth" the call that would have gone too deep counts."""
+        self.steps_used += steps
+        self.deepest = max(self.deepest, len(calls) + (limit == "depth"))
+        self.memory_used = held(calls, frame)
+        raise BudgetExceeded(limit, self)
+
+    def used(self) -> dict:
+        return { "steps": self.steps_used, "depth": self.deepest, "memory": self.memory_used }
+
+    def remaining(self) -> dict:
+        return {
+            "steps": None if self.steps is None else max(self.steps - self.steps_used, 0),
+            "depth": None if self.depth is None else max(self.depth - self.deepest, 0),
+            "memory": None if self.memory is None else max(self.memory - self.memory_used, 0),
+        }
+
+    def report(self) -> str:
+        used, limits = self.used(), { "steps": self.steps, "depth": self.depth, "memory": self.memory }
+        return ", ".join(f"{name} {used[name]} of {'-' if limits[name] is None else limits[name]}" for name in used)
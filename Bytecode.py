@@ -0,0 +1,243 @@
+# Compiles linked nodes into a flat instruction stream for VM.py.
+# Every instruction is two words in an array: the opcode and its argument (0 when it has none).
+# Arguments index into the constants / names table of their Code, jumps hold the offset of their target
+# and the _LOCAL instructions the slot in the current frame.
+
+from __future__ import annotations
+from array import array
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any
+
+from DataTypes.Nodes import *
+from Linker import FunctionCallable
+
+
+class Op(IntEnum):
+    CONST         =  0 # push constants[arg]
+    LOAD_LOCAL    =  1 # push slot arg of the current frame
+    STORE_LOCAL   =  2 # pop into slot arg of the current frame
+    LOAD          =  3 # push the value at addresses[arg] (names[arg] in the source)
+    STORE         =  4 # pop into addresses[arg]
+    POP           =  5 # drop the top of the stack
+    UNARY         =  6 # apply UnaryOperators[arg] to the top of the stack
+    BINARY        =  7 # pop the right operand, apply BinaryOperators[arg] to it and the left one on top
+    JUMP          =  8 # continue at offset arg
+    JUMP_IF_FALSE =  9 # pop, continue at offset arg if it was falsy
+    FUNCTION      = 10 # push the function constants[arg], declared in the current frame
+    CHECK         = 11 # make sure the top of the stack can be called like constants[arg] = (callee node, number of arguments)
+    CALL          = 12 # call the function below the arg arguments on top of the stack with them
+    RETURN        = 13 # continue in the caller, the return value stays on top of the stack
+    END           = 14 # stop and return the top of the stack
+    TAIL_CALL     = 15 # like CALL, but the callee returns to the caller of the current function
+
+
+# same order as UnaryOperators / BinaryOperators in DataTypes.Nodes, the VM indexes those by position.
+Unaries = [UnaryMinus, UnaryBang]
+
+Binaries = [BinaryPlus, BinaryMinus, BinaryStar, BinarySlash, BinaryPercent, BinaryLeftShift, BinaryRightShift,
+            BinaryLessThan, BinaryLessEquals, BinaryGreaterThan, BinaryGreaterEquals, BinaryEquals, BinaryNotEquals,
+            BinaryAnd, BinaryOr]
+
+Expressions = (Literal, UnaryMinus, UnaryBang, Reference, AnonymousFunction, FunctionCall, *Binaries)
+
+
+@dataclass
+class Code:
+    name: str
+    size: int # of its frame
+    instructions: array = field(default_factory=lambda: array('l'))
+    constants: list[Any] = field(default_factory=list)
+    names: list[str] = field(default_factory=list)
+    addresses: list[Address] = field(default_factory=list)
+    locals: dict[int, str] = field(default_factory=dict) # slot -> name, only for disassemble
+
+
+class Compiler:
+    def __init__(self, name: str, size: int):
+        self.code = Code(name, size)
+        self.constant_index = {}
+        self.name_index = {}
+
+    def emit(self, op: Op, arg: int = 0) -> int:
+        """appends an instruction and returns its offset."""
+        self.code.instructions.extend((op, arg))
+        return len(self.code.instructions) - 2
+
+    def patch(self, jump: int):
+        """points an already emitted jump at the next instruction."""
+        self.code.instructions[jump + 1] = len(self.code.instructions)
+
+    def constant(self, value) -> int:
+        try:
+            key = (type(value), value)
+            if key not in self.constant_index:
+                self.constant_index[key] = len(self.code.constants)
+                self.code.constants.append(value)
+            return self.constant_index[key]
+        except TypeError: # unhashable, functions and call sites are never shared anyway
+            self.code.constants.append(value)
+            return len(self.code.constants) - 1
+
+    def load(self, name: str, address: Address):
+        match address:
+            case (0, slot):
+                self.code.locals[slot] = name
+                self.emit(Op.LOAD_LOCAL, slot)
+            case _:
+                self.emit(Op.LOAD, self.name(name, address))
+
+    def store(self, name: str, address: Address):
+        match address:
+            case (0, slot):
+                self.code.locals[slot] = name
+                self.emit(Op.STORE_LOCAL, slot)
+            case _:
+                self.emit(Op.STORE, self.name(name, address))
+
+    def name(self, name: str, address: Address) -> int:
+        if (name, address) not in self.name_index:
+            self.name_index[name, address] = len(self.code.names)
+            self.code.names.append(name)
+            self.code.addresses.append(address)
+        return self.name_index[name, address]
+
+    def expression(self, tree):
+        """code that pushes the value evaluate(scope, tree) returns."""
+        match tree:
+            case Literal(value, _):
+                self.emit(Op.CONST, self.constant(value.literal))
+
+            case UnaryMinus(value) | UnaryBang(value):
+                self.expression(value)
+                self.emit(Op.UNARY, Unaries.index(type(tree)))
+
+            case Node() if type(tree) in Binaries:
+                self.expression(tree.left)
+                self.expression(tree.right)
+                self.emit(Op.BINARY, Binaries.index(type(tree)))
+
+            case Reference(name, address):
+                self.load(name.lexeme, address)
+
+            case AnonymousFunction(args, body, size):
+                self.emit(Op.FUNCTION, self.constant(function("<anonymous>", args, body, size)))
+
+            case FunctionCall(callee, args):
+                self.expression(callee)
+                self.emit(Op.CHECK, self.constant((callee, len(args))))
+                for arg in args:
+                    self.expression(arg)
+                self.emit(Op.CALL, len(args))
+
+            case _:
+                # statements and anything evaluate does not know have no value
+                self.statement(tree)
+                self.emit(Op.CONST, self.constant(None))
+
+    def statement(self, tree):
+        """code that does what evaluate(scope, tree) does, without leaving anything on the stack."""
+        match tree:
+            case Node() if isinstance(tree, Expressions):
+                self.expression(tree)
+                self.emit(Op.POP)
+
+            case If(cond, stmt, otherwise):
+                self.expression(cond)
+                skip_stmt = self.emit(Op.JUMP_IF_FALSE)
+                self.statement(stmt)
+                if otherwise is None:
+                    self.patch(skip_stmt)
+                else:
+                    skip_otherwise = self.emit(Op.JUMP)
+                    self.patch(skip_stmt)
+                    self.statement(otherwise)
+                    self.patch(skip_otherwise)
+
+            case Else(stmt):
+                self.statement(stmt)
+
+            case While(cond, stmt):
+                start = len(self.code.instructions)
+                self.expression(cond)
+                exit = self.emit(Op.JUMP_IF_FALSE)
+                self.statement(stmt)
+                self.emit(Op.JUMP, start)
+                self.patch(exit)
+
+            case Block(stmts):
+                for stmt in stmts:
+                    self.statement(stmt)
+
+            case Return(TailCall(callee, args)):
+                self.expression(callee)
+                self.emit(Op.CHECK, self.constant((callee, len(args))))
+                for arg in args:
+                    self.expression(arg)
+                self.emit(Op.TAIL_CALL, len(args))
+
+            case Return(expr):
+                self.expression(expr)
+                self.emit(Op.RETURN)
+
+            case ValueDeclaration(name, value, address) | VariableDeclaration(name, value, address) | VariableAssignment(name, value, address):
+                self.expression(value)
+                self.store(name.lexeme, address)
+
+            case FunctionDeclaration(name, args, body, address, size):
+                self.emit(Op.FUNCTION, self.constant(function(name.lexeme, args, body, size)))
+                self.store(name.lexeme, address)
+
+
+def function(name: str, args, body, size: int) -> FunctionCallable:
+    """what a function declaration evaluates to with its body compiled, still without the frame it is declared in."""
+    return FunctionCallable(args, body, code=compile_function(name, args, body, size), size=size)
+
+
+def compile_function(name: str, args, body, size: int) -> Code:
+    compiler = Compiler(name, size)
+    for slot, arg in enumerate(args, 1):
+        compiler.code.locals[slot] = arg.lexeme
+    compiler.statement(body)
+    compiler.emit(Op.CONST, compiler.constant(None))
+    compiler.emit(Op.RETURN)
+    return compiler.code
+
+
+def compile_file(tree) -> Code:
+    """a linked tree as code that ENDs with the value evaluate(scope, tree) would return."""
+    compiler = Compiler("<file>", tree.size if isinstance(tree, File) else 1)
+    match tree:
+        case File([single]):
+            compiler.expression(single)
+        case File(stmts):
+            for stmt in stmts:
+                compiler.statement(stmt)
+            compiler.emit(Op.CONST, compiler.constant(None))
+        case other:
+            compiler.expression(other)
+    compiler.emit(Op.END)
+    return compiler.code
+
+
+def disassemble(code: Code) -> str:
+    """a listing of code and every function compiled into it, like python's dis."""
+    lines, functions = [f"{code.name}:"], []
+    instructions = code.instructions
+    for offset in range(0, len(instructions), 2):
+        op, arg = Op(instructions[offset]), instructions[offset + 1]
+        match op:
+            case Op.CONST: detail = repr(code.constants[arg])
+            case Op.FUNCTION:
+                functions.append(code.constants[arg].code)
+                detail = f"fun {code.constants[arg].code.name}"
+            case Op.LOAD_LOCAL | Op.STORE_LOCAL: detail = code.locals[arg]
+            case Op.LOAD | Op.STORE: detail = f"{code.names[arg]} @ {code.addresses[arg]}"
+            case Op.UNARY: detail = Unaries[arg].__name__
+            case Op.BINARY: detail = Binaries[arg].__name__
+            case Op.JUMP | Op.JUMP_IF_FALSE: detail = f"to {arg}"
+            case Op.CHECK: detail = f"{code.constants[arg][1]} arguments"
+            case Op.CALL | Op.TAIL_CALL: detail = f"{arg} arguments"
+            case _: detail = None
+        lines.append(f"{offset:>6} {op.name}" if detail is None else f"{offset:>6} {op.name:<14}{arg:>4} ({detail})")
+    return "\n\n".join(["\n".join(lines), *(disassemble(function) for function in functions)])
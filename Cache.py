@@ -0,0 +1,99 @@
+# The .bangc cache: the linked tree of a file (and the global scope linking it left behind) stored next to it,
+# like python's .pyc files. A cache is only used when its header matches the hash of the source and the interpreter
+# version, so editing the file or the interpreter makes it stale, and it is written again on the next run.
+# It is a pickle, but one read by an Unpickler that only rebuilds the classes linked trees are made of. an unrestricted
+# pickle.load can call any python function, and the header is no protection: anyone who can write the file can compute it.
+
+import hashlib
+import os
+import pickle
+import sys
+
+import Lib
+import Linker
+from DataTypes import Nodes
+from DataTypes.Tokens import Token, TokenType
+
+MAGIC = b"BANGC\0"
+
+# the modules that decide what a linked tree looks like, changing any of them invalidates all caches.
+# that is everything the lexers, the parser and the Linker import, Tests/CacheTest.py checks none is missing.
+Sources = [
+    "CompiledLexer.py", "Lexer.py", "Parser.py", "Linker.py", "Lib.py",
+    "Consumers/__init__.py", "Consumers/Consumer.py", "Consumers/Cursor.py", "Consumers/GenericConsumers.py",
+    "Consumers/StringConsumers.py", "Consumers/TokenConsumers.py",
+    "DataTypes/__init__.py", "DataTypes/Nodes.py", "DataTypes/Tokens.py", "DataTypes/Scopes.py",
+]
+
+_version = None
+
+
+def version() -> bytes:
+    """Lib.VERSION, the python version and a hash of the Sources."""
+    global _version
+    if _version is None:
+        digest = hashlib.sha256(f"{Lib.VERSION} {sys.version_info[:2]}".encode())
+        root = os.path.dirname(os.path.abspath(__file__))
+        for source in Sources:
+            with open(os.path.join(root, source), "rb") as file:
+                digest.update(file.read())
+        _version = digest.digest()
+    return _version
+
+
+def key(source: str) -> bytes:
+    return hashlib.sha256(version() + source.encode()).digest()
+
+
+def path_of(path: str) -> str:
+    """where the cache of the file at path goes: some.bang -> some.bangc"""
+    return path + "c"
+
+
+def type_of(value):
+    return type(value)
+
+# what the Unpickler may look up: (module, name) -> what it gets
+Classes = {
+    **{ ("DataTypes.Nodes", name): value for name, value in vars(Nodes).items() if isinstance(value, type) and issubclass(value, Nodes.Node) },
+    ("DataTypes.Tokens", "Token"): Token,
+    ("DataTypes.Tokens", "TokenType"): TokenType,
+    **{ ("Linker", name): getattr(Linker, name) for name in ["Frame", "FrameScope", "FunctionCallable", "ValueSlot"] },
+    **{ ("builtins", value.__name__): value for value in [int, str, bool, float] },
+    ("builtins", "type"): type_of, # NoneType is pickled as type(None), this can't make new classes
+}
+
+class Unpickler(pickle.Unpickler):
+    """rebuilds linked trees and scopes and nothing else."""
+    def find_class(self, module: str, name: str):
+        if (module, name) not in Classes:
+            raise pickle.UnpicklingError(f"{module}.{name} is not part of a linked tree")
+        return Classes[module, name]
+
+
+def load(path: str, source: str):
+    """the (linked tree, global scope) cached for source at path, None if there is none or it is stale."""
+    try:
+        with open(path, "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC or file.read(32) != key(source):
+                return None
+            return Unpickler(file).load()
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+
+def store(path: str, source: str, linked, scope) -> bool:
+    """writes the cache, returns whether that worked. (read only directories, trees too deep to pickle)"""
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as file:
+            file.write(MAGIC + key(source))
+            pickle.dump((linked, scope), file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path) # whole or not at all, another run might be reading it
+        return True
+    except (OSError, RecursionError, pickle.PicklingError):
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+        return False
@@ -0,0 +1,270 @@
+# A faster backend for Evaluator.evaluate: a linked tree is compiled once into nested python closures,
+# one specialised closure per node, so running it again (loop and function bodies) skips the match on every node.
+# Results are identical to Evaluator.evaluate, Tests/ClosureCompilerTest.py compares the two.
+
+import functools
+from typing import Any, Callable
+
+from DataTypes.Nodes import *
+from Evaluator import ReturnException, Returned, TailCalled, memo
+from Linker import FunctionCallable, enclosing, call_frame
+
+type Closure = Callable[[list], Any]
+
+def nothing(frame):
+    return None
+
+
+# int fast paths, for operators the Linker found both operands of to be ints. every operator and shape of its operands
+# gets a closure with a code object of its own, which python specialises for ints (the generic one below sees every
+# type and operator), and local slots and literals are read right in it instead of through closures of their own.
+IntSymbols = {
+    BinaryPlus: "+", BinaryMinus: "-", BinaryStar: "*", BinarySlash: "/", BinaryPercent: "%",
+    BinaryLeftShift: "<<", BinaryRightShift: ">>", BinaryLessThan: "<", BinaryLessEquals: "<=",
+    BinaryGreaterThan: ">", BinaryGreaterEquals: ">=", BinaryEquals: "==", BinaryNotEquals: "!=",
+    BinaryAnd: "&", BinaryOr: "|",
+}
+
+Shapes = { "slot": "frame[{}]", "literal": "{}", "closure": "{}(frame)" }
+
+def operand(tree) -> tuple[str, Any]:
+    """the shape of an operand and what its closure needs: the slot, the value or its own closure."""
+    match tree:
+        case Reference(_, (0, slot)): return "slot", slot
+        case Literal(value, _): return "literal", value.literal
+    return "closure", compile_node(tree)
+
+@functools.cache
+def int_operator(symbol: str, left: str, right: str) -> Callable[[Any, Any], Closure]:
+    """makes the closures for symbol with operands of the shapes left and right, compiled on first use."""
+    namespace = {}
+    exec(f"def make(a, b): return lambda frame: {Shapes[left].format('a')} {symbol} {Shapes[right].format('b')}", namespace)
+    return namespace["make"]
+
+
+def returns(tree) -> bool:
+    """whether running the statement tree can end in a return. only closures of those return a Signal (or None),
+    everything else needs no checks after it ran."""
+    match tree:
+        case Return(): return True
+        case If(_, stmt, otherwise): return returns(stmt) or returns(otherwise)
+        case Else(stmt) | While(_, stmt): return returns(stmt)
+        case Block(stmts): return any(returns(stmt) for stmt in stmts)
+    return False
+
+
+def statement(tree) -> Closure:
+    """the closure for a statement whose result is checked for a Signal, so it must not return anything else."""
+    closure = compile_node(tree)
+    if returns(tree) or closure is nothing:
+        return closure
+    def quiet(frame):
+        closure(frame)
+    return quiet
+
+
+def compile_node(tree) -> Closure:
+    """the closure that does what evaluate(frame, tree) does, for any frame."""
+    match tree:
+        case Literal(value, _):
+            literal = value.literal
+            return lambda frame: literal
+
+        case UnaryMinus(value) | UnaryBang(value):
+            op, value = UnaryOperators[type(tree)], compile_node(value)
+            return lambda frame: op(value(frame))
+
+        case Node() if type(tree) in BinaryOperators and tree.left.type is int and tree.right.type is int:
+            (left, a), (right, b) = operand(tree.left), operand(tree.right)
+            return int_operator(IntSymbols[type(tree)], left, right)(a, b)
+
+        case Node() if type(tree) in BinaryOperators:
+            op, left = BinaryOperators[type(tree)], compile_node(tree.left)
+            match tree.right:
+                case Literal(value, _):
+                    literal = value.literal
+                    return lambda frame: op(left(frame), literal)
+                case right:
+                    right = compile_node(right)
+                    return lambda frame: op(left(frame), right(frame))
+
+        case If(cond, stmt, otherwise) if returns(tree):
+            cond, stmt, otherwise = compile_node(cond), statement(stmt), statement(otherwise)
+            def if_(frame):
+                if cond(frame):
+                    return stmt(frame)
+                return otherwise(frame)
+            return if_
+
+        case If(cond, stmt, otherwise):
+            cond, stmt, otherwise = compile_node(cond), compile_node(stmt), compile_node(otherwise)
+            def if_(frame):
+                if cond(frame):
+                    stmt(frame)
+                else:
+                    otherwise(frame)
+            return if_
+
+        case Else(stmt):
+            return statement(stmt)
+
+        case While(cond, stmt) if returns(tree):
+            cond, stmt = compile_node(cond), compile_node(stmt)
+            def while_(frame):
+                while cond(frame):
+                    signal = stmt(frame)
+                    if signal is not None:
+                        return signal
+            return while_
+
+        case While(cond, stmt):
+            cond, stmt = compile_node(cond), compile_node(stmt)
+            def while_(frame):
+                while cond(frame):
+                    stmt(frame)
+            return while_
+
+        case Block(stmts) if returns(tree):
+            # only the statements that can return are checked
+            stmts = [(compile_node(stmt), returns(stmt)) for stmt in stmts]
+            def block(frame):
+                for stmt, checked in stmts:
+                    signal = stmt(frame)
+                    if checked and signal is not None:
+                        return signal
+            return block
+
+        case Block(stmts):
+            stmts = [compile_node(stmt) for stmt in stmts]
+            def block(frame):
+                for stmt in stmts:
+                    stmt(frame)
+            return block
+
+        case Return(TailCall(callee_node, args)):
+            prepare = compile_prepare(callee_node, args)
+            return lambda frame: TailCalled(*prepare(frame))
+
+        case Return(expr):
+            expr = compile_node(expr)
+            return lambda frame: Returned(expr(frame))
+
+        case ValueDeclaration(_, value, (depth, slot)) | VariableDeclaration(_, value, (depth, slot)) | VariableAssignment(_, value, (depth, slot)):
+            value = compile_node(value)
+            match depth:
+                case 0:
+                    def assign(frame):
+                        frame[slot] = value(frame)
+                case 1:
+                    def assign(frame):
+                        frame[0][slot] = value(frame)
+                case _:
+                    def assign(frame):
+                        enclosing(frame, depth)[slot] = value(frame)
+            return assign
+
+        case Reference(_, (depth, slot)):
+            match depth:
+                case 0: return lambda frame: frame[slot]
+                case 1: return lambda frame: frame[0][slot]
+                case _: return lambda frame: enclosing(frame, depth)[slot]
+
+        case FunctionDeclaration(_, args, body, (_, slot), size, reads):
+            compiled_body = compile_node(body)
+            def declare(frame):
+                frame[slot] = FunctionCallable(args, body, compiled_body, size=size, frame=frame, reads=reads)
+            return declare
+
+        case AnonymousFunction(args, body, size):
+            compiled_body = compile_node(body)
+            return lambda frame: FunctionCallable(args, body, compiled_body, size=size, frame=frame)
+
+        case File(stmts, size):
+            return grow(compile_file(stmts), size)
+
+        case FunctionCall(callee_node, args):
+            prepare = compile_prepare(callee_node, args)
+            def call(frame):
+                function, temp_frame = prepare(frame)
+                if function.reads is not None and memo.enabled:
+                    return memo.call(function, temp_frame, run)
+                while True: # same as run, inlined since calls are hot
+                    signal = compiled(function)(temp_frame)
+                    if type(signal) is Returned:
+                        return signal.value
+                    if type(signal) is not TailCalled:
+                        return None
+                    function, temp_frame = signal.function, signal.frame
+            return call
+
+    return nothing
+
+
+def run(function: FunctionCallable, frame: list):
+    """Evaluator.run_call with the compiled body."""
+    while True:
+        signal = compiled(function)(frame)
+        if type(signal) is Returned:
+            return signal.value
+        if type(signal) is not TailCalled:
+            return None
+        function, frame = signal.function, signal.frame
+
+
+def compile_prepare(callee_node, args) -> Closure:
+    """the closure doing what Evaluator.prepare_call does."""
+    callee, args = compile_node(callee_node), [compile_node(arg) for arg in args]
+    la = len(args)
+    def prepare(frame):
+        function = callee(frame)
+        if not isinstance(function, FunctionCallable):
+            raise Exception(f"Illegal callee: {callee_node}")
+        ls = len(function.slots)
+        if la < ls: raise Exception(f"Not enough arguments given, expected {ls}, got {la}")
+        if la > ls: raise Exception(f"Too many arguments given, expected {ls}, got {la}")
+        return function, call_frame(function, [arg(frame) for arg in args])
+    return prepare
+
+
+def top_level(tree) -> Closure:
+    """the closure for a statement of the file, a return there has no call to go back to."""
+    closure = compile_node(tree)
+    if not returns(tree):
+        return closure
+    def raising(frame):
+        signal = closure(frame)
+        if signal is not None:
+            raise ReturnException(value= signal.value)
+    return raising
+
+
+def compile_file(stmts) -> Closure:
+    match stmts:
+        case [single]:
+            return top_level(single)
+        case [*multiple]:
+            multiple = [top_level(stmt) for stmt in multiple]
+            def file(frame):
+                for stmt in multiple:
+                    stmt(frame)
+            return file
+
+
+def grow(closure: Closure, size: int) -> Closure:
+    """runs closure after making room in the (global) frame for everything the file declares."""
+    def file(frame):
+        frame.extend([None] * (size - len(frame)))
+        return closure(frame)
+    return file
+
+
+def compiled(function: FunctionCallable) -> Closure:
+    """the compiled body of a function, compiling it first if it was created by Evaluator.evaluate."""
+    if function.compiled is None:
+        function.compiled = compile_node(function.body)
+    return function.compiled
+
+
+def evaluate(frame, tree):
+    """same interface as Evaluator.evaluate, so it can be passed to the Interpreter instead."""
+    return compile_node(tree)(frame)
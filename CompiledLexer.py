@@ -0,0 +1,97 @@
+# A faster backend for Lexer.TokenLexer: the same token definitions compiled into one regular expression,
+# matched once per token instead of running a chain of consumers per character.
+# Results are identical to Lexer.TokenLexer, Tests/CompiledLexerTest.py compares the two.
+
+import re
+from typing import Generator, TextIO
+
+import Lexer
+from DataTypes.Tokens import Token
+from Consumers.Consumer import Consume, ConsumeError, ConsumeSuccess
+from Consumers.Cursor import Cursor
+
+# alternatives are ordered like Lexer.TokenLexer: comments before '/', longer operators before their prefixes.
+# WORD covers both NumberLexer and IdentifierKeywordLexer (both accept a subset of \w = str.isalnum() or '_'),
+# which one it is gets decided in word_token.
+TokenPattern = re.compile("|".join([
+    r"(?P<COMMENT>//(?P<comment>[^\n]*)\n)",
+    r'(?P<STRING>"(?P<double>[^"]*)"|\'(?P<single>[^\']*)\')',
+    "(?P<SIMPLE>" + "|".join(re.escape(lexeme) for lexeme in sorted(Lexer.SimpleTokens, key=len, reverse=True)) + ")",
+    r"(?P<WORD>\w+)",
+]))
+
+WhitespacePattern = re.compile("[" + re.escape(''.join(sorted(Lexer.WhitespaceLexer.first))) + "]*")
+
+
+def word_token(word):
+    """NumberLexer if it consumes the whole word (it wins ties with IdentifierKeywordLexer), an identifier or keyword otherwise."""
+    if word[0].isdigit() and '__' not in word and all(c.isdigit() or c == '_' for c in word):
+        return Lexer.number_token(word.replace('_', ''))
+    return Lexer.ident_or_keyword(word)
+
+
+def token(m: re.Match) -> Token:
+    match m.lastgroup:
+        case "COMMENT": return Lexer.comment_token(m.group("comment"))
+        case "STRING":
+            single = m.group("single")
+            return Lexer.string_token('"', m.group("double")) if single is None else Lexer.string_token("'", single)
+        case "SIMPLE": return Lexer.SimpleTokens[m.group()]
+        case "WORD": return word_token(m.group())
+
+
+def lex(source: str, start: int) -> tuple[list[Token], int]:
+    """tokenizes source from start for as long as it can, returns the tokens and where it stopped."""
+    tokens = []
+    pos = start
+    match_token, match_whitespace = TokenPattern.match, WhitespacePattern.match
+    while (m := match_token(source, pos)) is not None:
+        tokens.append(token(m))
+        pos = match_whitespace(source, m.end()).end()
+    return tokens, pos
+
+
+def truncated(buffer: str, offset: int, m: re.Match | None, end: int) -> bool:
+    """whether the next chunk could still change what matches at offset."""
+    if m is None:
+        return offset == len(buffer) or buffer[offset] in "\"'" # a string that is unterminated so far
+    # anything reaching the end might continue, and a comment might just be missing its newline yet.
+    return end == len(buffer) or m.lastgroup != "COMMENT" and buffer.startswith("//", offset)
+
+
+def stream(file: TextIO, chunk_size: int = 1 << 16) -> Generator[Token, None, ConsumeError | None]:
+    """lazily tokenizes a text file while reading it in chunks, only the unfinished end of the last chunk is kept around.
+    yields the same tokens as TokenLexer, and returns a ConsumeError when it gets stuck before the end of the file."""
+    buffer, offset, consumed, eof = "", 0, 0, False
+    match_token, match_whitespace = TokenPattern.match, WhitespacePattern.match
+    while True:
+        m = match_token(buffer, offset)
+        end = m and match_whitespace(buffer, m.end()).end()
+        if not eof and truncated(buffer, offset, m, end):
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buffer, offset, consumed = buffer[offset:] + chunk, 0, consumed + offset
+            continue
+        if m is None:
+            break
+        yield token(m)
+        offset = end
+    if offset < len(buffer):
+        return ConsumeError(buffer[offset:], f"Cannot tokenize '{buffer[offset]}' @ {consumed + offset}.", consumed + offset)
+    if consumed + offset == 0:
+        return ConsumeError("", "Input is empty.", 0)
+
+
+def consume(collection, pos):
+    match Cursor.of(collection):
+        case Cursor(str() as source, offset) as cursor: start = offset
+        case Cursor(buffer, offset) as cursor: source, start = ''.join(buffer[offset:]), 0
+        case _: return Lexer.TokenLexer(collection, pos)
+    tokens, end = lex(source, start)
+    if not tokens:
+        # not even one token, let the combinators describe why.
+        return Lexer.TokenLexer(collection, pos)
+    return ConsumeSuccess(cursor.advance(end - start), tokens, pos + end - start)
+
+TokenLexer = Consume(consume)
+"""Converts a string into a list of tokens if possible, like Lexer.TokenLexer."""
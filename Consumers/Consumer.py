@@ -1,79 +1,87 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from typing import Iterable, Callable, Any
-from Lib import cons, Ordering, compare
+from Lib import cons, cons_into, reduce, Ordering, compare
+from .Cursor import Cursor
 
 type ConsumeResult[T] = ConsumeSuccess[T] | ConsumeError[T]
 type ConsumeFunction[T] = Callable[[Iterable[T], int], ConsumeResult[T]]
 
+# memo table of the packrat parse that is currently running, keyed by (rule, position). see Consume.packrat / Consume.memo
+_memo_table: dict | None = None
+
 @dataclass
 class ConsumeSuccess[T]:
-    rest: Iterable[T]
+    rest: Cursor[T] | Iterable[T]
     parsed: T
     progress: int
 
-@dataclass
+@dataclass(eq=False, repr=False)
 class ConsumeError[T]:
-    rest: Iterable[T]
-    description: str
+    rest: Cursor[T] | Iterable[T]
+    reason: str | Callable[[], str] # the description, or something that builds it once it is actually needed
     progress: int
 
+    # most errors are only there for an alternative that is not taken, formatting all of them up front is expensive
+    # and with packrat parsing their (merged) descriptions would add up in the memo table.
+    @property
+    def description(self) -> str:
+        if callable(self.reason):
+            self.reason = self.reason()
+        return self.reason
+
+    def __eq__(self, other):
+        match other:
+            case ConsumeError(rest, _, progress):
+                return (self.rest, self.description, self.progress) == (rest, other.description, progress)
+            case _:
+                return NotImplemented
+
+    def __repr__(self):
+        return f"ConsumeError(rest={self.rest!r}, description={self.description!r}, progress={self.progress!r})"
+
 class Consume[T]:
-    def __init__(self, func: ConsumeFunction[T]):
+    def __init__(self, func: ConsumeFunction[T], first: frozenset | None = None, key: Callable[[T], Any] | None = None):
         self.consume = func
+        # FIRST set: key(element) of every element a success can start with. None when unknown, or when nothing may be consumed.
+        # key=None means the elements are compared themselves (chars), TokenConsumers key tokens by their type.
+        self.first = first
+        self.key = key
 
     def __add__(self, other: Consume[T]) -> Consume[T]:
         def consume(collection: Iterable[T], pos: int) -> ConsumeResult[T]:
-            match self(collection, pos):
+            match self.consume(collection, pos):
                 case ConsumeSuccess(rest1, parsed1, pos1):
-                    match other(rest1, pos1):
+                    match other.consume(rest1, pos1):
                         case ConsumeSuccess(rest2, parsed2, pos2):
                             return ConsumeSuccess(rest2, cons(parsed1, parsed2), pos2)
                         case ConsumeError(rest2, desc2, pos2):
                             return ConsumeError(rest2, desc2, pos2)
                 case ConsumeError(rest1, desc1, pos1):
                     return ConsumeError(rest1, desc1, pos1)
-        return Consume(consume)
+        return Consume(consume, self.first, self.key)
 
     def __or__(self, other: Consume[T]) -> Consume[T]:
-        def consume(collection: Iterable[T], pos: int) -> ConsumeResult[T]:
-            # match self(collection, pos):
-            #     case ConsumeSuccess(rest1, parsed1, pos1):
-            #         return ConsumeSuccess(rest1, parsed1, pos1)
-            #     case ConsumeError(rest1, error1, pos1):
-            #         match other(collection, pos):
-            #             case ConsumeSuccess(rest2, parsed2, pos2):
-            #                 return ConsumeSuccess(rest2, parsed2, pos2)
-            #             case ConsumeError(rest2, error2, pos2):
-            #                 if pos2 > pos1:
-            #                     return ConsumeError(rest2, error2, pos2)
-            #                 elif pos1 > pos2:
-            #                     return ConsumeError(rest1, error1, pos1)
-            #                 else:
-            #                     return ConsumeError(rest1, f"{error1} | {error2}", pos1)
-
-            match self(collection, pos), other(collection, pos):
-                case ConsumeSuccess(rest1, parsed1, pos1), ConsumeSuccess(rest2, parsed2, pos2):
-                    match compare(pos1, pos2):
-                        case Ordering.LESS: return ConsumeSuccess(rest2, parsed2, pos2)
-                        case Ordering.EQUAL: return ConsumeSuccess(rest1, parsed1, pos1) # maybe return error cause ambiguous match
-                        case Ordering.GREATER: return ConsumeSuccess(rest1, parsed1, pos1)
-                case ConsumeSuccess(rest, parsed, pos), ConsumeError(_, _, _):
-                    return ConsumeSuccess(rest, parsed, pos)
-                case ConsumeError(_, _, _), ConsumeSuccess(rest, parsed, pos):
-                    return ConsumeSuccess(rest, parsed, pos)
-                case ConsumeError(rest1, desc1, pos1), ConsumeError(rest2, desc2, pos2):
-                    match compare(pos1, pos2):
-                        case Ordering.LESS: return ConsumeError(rest2, desc2, pos2)
-                        case Ordering.EQUAL: return ConsumeError(rest2, f"{desc1} | {desc2}", pos2)
-                        case Ordering.GREATER: return ConsumeError(rest1, desc1, pos1)
-        return Consume(consume)
+        """longest match: runs both alternatives and takes the one that got further, self on a tie."""
+        return Choice([*self.alternatives(True), *other.alternatives(True)], True)
+
+    def __truediv__(self, other: Consume[T]) -> Consume[T]:
+        """ordered choice: other is only tried when self fails. unlike | this does not look for the longest match,
+        so it only gives the same result when self can never succeed on a prefix of what other would consume."""
+        return Choice([*self.alternatives(False), *other.alternatives(False)], False)
+
+    def alternatives(self, longest: bool) -> list[Consume[T]]:
+        """the branches of a choice of the same kind, so chains of | or / flatten into one choice. just [self] otherwise."""
+        return [self]
+
+    def or_else(self, other: Consume[T]) -> Consume[T]:
+        return self / other
 
     def __rshift__(self, other: Consume[T]) -> Consume[T]:
         def consume(collection: Iterable[T], pos: int) -> ConsumeResult[T]:
-            match self(collection, pos):
+            match self.consume(collection, pos):
                 case ConsumeSuccess(rest1, _, pos1):
-                    match other(rest1, pos1):
+                    match other.consume(rest1, pos1):
                         case ConsumeSuccess(rest2, parsed, pos2):
                             return ConsumeSuccess(rest2, parsed, pos2)
                         case ConsumeError(rest2, desc2, pos2):
@@ -81,74 +89,74 @@ class Consume[T]:
                 case ConsumeError(rest1, desc1, pos1):
                     return ConsumeError(rest1, desc1, pos1)
 
-        return Consume(consume)
+        return Consume(consume, self.first, self.key)
 
     def __lshift__(self, other: Consume[T]) -> Consume[T]:
         def consume(collection: Iterable[T], pos: int) -> ConsumeResult[T]:
-            match self(collection, pos):
+            match self.consume(collection, pos):
                 case ConsumeSuccess(rest1, parsed, pos1):
-                    match other(rest1, pos1):
+                    match other.consume(rest1, pos1):
                         case ConsumeSuccess(rest2, _, pos2):
                             return ConsumeSuccess(rest2, parsed, pos2)
                         case ConsumeError(rest2, desc2, pos2):
                             return ConsumeError(rest2, desc2, pos2)
                 case ConsumeError(rest1, desc1, pos1):
                     return ConsumeError(rest1, desc1, pos1)
-        return Consume(consume)
+        return Consume(consume, self.first, self.key)
 
 
     def continuous(self) -> Consume[T]:
         def consume(collection: Iterable[T], progress: int) -> ConsumeResult[T]:
-            match self(collection, progress):
+            match self.consume(collection, progress):
                 case ConsumeError(rest, desc, pos): return ConsumeError(rest, desc, pos)
                 case ConsumeSuccess(rest1, parsed1, pos1):
                     curr = ConsumeSuccess(rest1, [parsed1], pos1)
                     while True:
-                        match self(curr.rest, curr.progress):
+                        match self.consume(curr.rest, curr.progress):
                             case ConsumeError(_, _, _): break
                             case ConsumeSuccess(rest2, parsed2, pos2):
-                                curr = ConsumeSuccess(rest2, cons(curr.parsed, parsed2), pos2)
+                                curr = ConsumeSuccess(rest2, cons_into(curr.parsed, parsed2), pos2)
                     return curr
-        return Consume(consume)
+        return Consume(consume, self.first, self.key)
 
 
     def delimited(self, other: Consume[T]) -> Consume[T]:
         def consume(collection: Iterable[T], pos: int) -> ConsumeResult[T]:
-            match self(collection, pos):
+            match self.consume(collection, pos):
                 case ConsumeError(rest, desc, pos): return ConsumeError(rest, desc, pos)
                 case ConsumeSuccess(rest, parsed, pos):
                     curr = ConsumeSuccess(rest, [parsed], pos)
                     while True:
-                        match other(rest, pos):
+                        match other.consume(rest, pos):
                             case ConsumeError(_, _, _): break
                             case ConsumeSuccess(rest, _, pos):
-                                match self(rest, pos):
+                                match self.consume(rest, pos):
                                     case ConsumeError(rest, desc, pos): return ConsumeError(rest, desc, pos)
                                     case ConsumeSuccess(rest, parsed, pos):
-                                        curr = ConsumeSuccess(rest, cons(curr.parsed, parsed), pos)
+                                        curr = ConsumeSuccess(rest, cons_into(curr.parsed, parsed), pos)
                     return curr
-        return Consume(consume)
+        return Consume(consume, self.first, self.key)
 
     def delimited_optional(self, other: Consume[T]) -> Consume[T]:
         return (self << other.optional()).continuous()
 
     def penetrate(self, func: Callable[[T], Any]) -> Consume[T]:
         def consume(collection: Iterable[T], pos: int) -> ConsumeResult[T]:
-            match self(collection, pos):
+            match self.consume(collection, pos):
                 case ConsumeSuccess(rest, parsed, pos): return ConsumeSuccess(rest, func(parsed), pos)
                 case err: return err
-        return Consume(consume)
+        return Consume(consume, self.first, self.key)
 
     def description(self, func: Callable[[str], str]) -> Consume[T]:
         def consume(collection: Iterable[T], pos: int) -> ConsumeResult[T]:
-            match self(collection, pos):
-                case ConsumeError(rest, desc, pos): return ConsumeError(rest, func(desc), pos)
+            match self.consume(collection, pos):
+                case ConsumeError(rest, _, pos) as error: return ConsumeError(rest, lambda: func(error.description), pos)
                 case succ: return succ
-        return Consume(consume)
+        return Consume(consume, self.first, self.key)
 
     def optional(self) -> Consume[T]:
         def consume(collection: Iterable[T], pos: int) -> ConsumeResult[T]:
-            match self(collection, pos):
+            match self.consume(collection, pos):
                 case ConsumeError(_, _, _): return ConsumeSuccess(collection, [], pos)
                 case succ: return succ
         return Consume(consume)
@@ -156,5 +164,79 @@ class Consume[T]:
     def bracketed(self, left: Consume[T], right: Consume[T]) -> Consume[T]:
         return left >> self << right
 
+    def memo(self) -> Consume[T]:
+        """marks a rule whose results are cached per position while a packrat parse is running. outside of one this is a no op."""
+        def consume(collection: Iterable[T], pos: int) -> ConsumeResult[T]:
+            if _memo_table is None:
+                return self.consume(collection, pos)
+            key = (consume, pos)
+            if (result := _memo_table.get(key)) is None:
+                result = _memo_table[key] = self.consume(collection, pos)
+            return result
+        return Consume(consume, self.first, self.key)
+
+    def packrat(self) -> Consume[T]:
+        """runs self with a fresh memo table for the .memo() rules inside it. the table is dropped when the call returns."""
+        def consume(collection: Iterable[T], pos: int) -> ConsumeResult[T]:
+            global _memo_table
+            outer, _memo_table = _memo_table, {}
+            try:
+                return self.consume(collection, pos)
+            finally:
+                _memo_table = outer
+        return Consume(consume, self.first, self.key)
+
+    def define(self, other: Consume[T]):
+        """supplies the definition of a forward declaration (Consume(lambda: None)) that other consumers already reference."""
+        self.consume, self.first, self.key = other.consume, other.first, other.key
+
     def __call__(self, collection: Iterable[T], pos: int) -> ConsumeResult[T]:
-        return self.consume(collection, pos)
\ No newline at end of file
+        return self.consume(collection, pos)
+
+
+def furthest[T](error1: ConsumeError[T], error2: ConsumeError[T]) -> ConsumeError[T]:
+    """the error that got further, both descriptions if they failed at the same position."""
+    match compare(error1.progress, error2.progress):
+        case Ordering.LESS: return error2
+        case Ordering.EQUAL: return ConsumeError(error2.rest, lambda: f"{error1.description} | {error2.description}", error2.progress)
+        case Ordering.GREATER: return error1
+
+
+class Choice[T](Consume[T]):
+    """n-ary | (longest=True) or / (longest=False), with the same result as chaining them pairwise.
+    When the alternatives have FIRST sets under the same key, the next element is looked up in a table of the alternatives
+    that can start with it. The others are only run to collect their errors once all of the candidates failed."""
+    def __init__(self, alternatives: list[Consume[T]], longest: bool):
+        self.branches = alternatives
+        self.longest = longest
+        keys = {alternative.key for alternative in alternatives if alternative.first is not None}
+        table, fallback, first, key = None, range(len(alternatives)), None, None
+        if len(keys) == 1:
+            key = keys.pop()
+            known = frozenset().union(*(alternative.first for alternative in alternatives if alternative.first is not None))
+            fallback = [i for i, alternative in enumerate(alternatives) if alternative.first is None]
+            table = {k: [i for i, alternative in enumerate(alternatives) if alternative.first is None or k in alternative.first] for k in known}
+            if not fallback: first = known
+
+        def consume(collection: Iterable[T], pos: int) -> ConsumeResult[T]:
+            candidates = range(len(alternatives))
+            if table is not None:
+                match Cursor.of(collection):
+                    case Cursor(buffer, offset) if offset < len(buffer):
+                        head = buffer[offset]
+                        candidates = table.get(head if key is None else key(head), fallback)
+            errors, best = {}, None
+            for i in candidates:
+                match alternatives[i].consume(collection, pos):
+                    case ConsumeSuccess(_, _, progress) as success:
+                        if not longest: return success
+                        if best is None or progress > best.progress: best = success
+                    case error:
+                        errors[i] = error
+            if best is not None: return best
+            return reduce([errors[i] if i in errors else alternatives[i].consume(collection, pos) for i in range(len(alternatives))], furthest)
+
+        super().__init__(consume, first, key)
+
+    def alternatives(self, longest: bool) -> list[Consume[T]]:
+        return self.branches if longest == self.longest else [self]
@@ -0,0 +1,59 @@
+from __future__ import annotations
+from collections.abc import Sequence
+
+
+class Cursor[T](Sequence):
+    """A read only view of `buffer` starting at `offset`.
+    Consumers pass these around as their `rest`, so taking one element off the front is O(1) instead of copying the tail.
+    The buffer is shared between all cursors of one consumption and must not be mutated while they are alive."""
+    __slots__ = ("buffer", "offset")
+    __match_args__ = ("buffer", "offset")
+
+    def __init__(self, buffer: Sequence[T], offset: int = 0):
+        self.buffer = buffer
+        self.offset = offset
+
+    @staticmethod
+    def of(collection) -> Cursor | None:
+        """wraps any sequence (without copying it) so consumers can index into it. returns None for everything else."""
+        match collection:
+            case Cursor(): return collection
+            case Sequence(): return Cursor(collection, 0)
+            case _: return None
+
+    def advance(self, n: int = 1) -> Cursor[T]:
+        return Cursor(self.buffer, self.offset + n)
+
+    def __len__(self) -> int:
+        return len(self.buffer) - self.offset
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1 and stop == len(self):
+                return Cursor(self.buffer, self.offset + start)
+            return self.buffer[self.offset:][index]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Cursor index out of range")
+        return self.buffer[self.offset + index]
+
+    def __iter__(self):
+        buffer = self.buffer
+        for i in range(self.offset, len(buffer)):
+            yield buffer[i]
+
+    def __eq__(self, other):
+        match other:
+            case Cursor(buffer, offset) if buffer is self.buffer:
+                return offset == self.offset
+            case Sequence():
+                return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+            case _:
+                return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Cursor({self.buffer[self.offset:]!r})"
@@ -1,22 +1,25 @@
 from .Consumer import Consume, ConsumeError, ConsumeSuccess
-from typing import Iterable, Callable
+from .Cursor import Cursor
+from typing import Iterable, Callable, Any
 from Lib import reduce
 
 
-def predicate[T](func: Callable[[T], bool], name: str) -> Consume[T]:
+def predicate[T](func: Callable[[T], bool], name: str, first: frozenset | None = None, key: Callable[[T], Any] | None = None) -> Consume[T]:
+    """first/key are the FIRST set of func if it is known, see Consume."""
     def parse(collection, pos):
-        match collection:
-            case head, *tail:
-                return ConsumeSuccess(tail, head, pos +1) if func(head) else ConsumeError(collection, f"{name} @ {pos} $> '{head}' did not match expected.", pos)
-            case []: return ConsumeError(collection, f"{name} @ {pos} $> Input is empty.", pos)
+        match Cursor.of(collection):
+            case Cursor(buffer, offset) if offset < len(buffer):
+                head = buffer[offset]
+                return ConsumeSuccess(Cursor(buffer, offset +1), head, pos +1) if func(head) else ConsumeError(collection, lambda: f"{name} @ {pos} $> '{head}' did not match expected.", pos)
+            case Cursor(): return ConsumeError(collection, f"{name} @ {pos} $> Input is empty.", pos)
             case _: return ConsumeError(collection, f"{name} @ {pos} $> Input has wrong format.", pos)
-    return Consume(parse)
+    return Consume(parse, first, key)
 
 def item[T](to_match: T, name: str) -> Consume[T]:
-    return predicate(lambda matcher: matcher == to_match, name)
+    return predicate(lambda matcher: matcher == to_match, name, frozenset([to_match]))
 
 def sequence[T](seq: Iterable[T], name: str) -> Consume[T]:
     ps = []
     for elem in seq:
         ps.append(item(elem, name))
-    return reduce(ps, Consume.__add__)
\ No newline at end of file
+    return reduce(ps, Consume.__add__)
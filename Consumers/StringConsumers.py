@@ -4,13 +4,13 @@ from Lib import reduce
 
 
 def char(to_match: str) -> Consume[str]:
-    return predicate(lambda c: c == to_match, f"¢ '{to_match}'")
+    return predicate(lambda c: c == to_match, f"¢ '{to_match}'", frozenset([to_match]))
 
 def not_char(to_match: str) -> Consume[str]:
     return predicate(lambda c: c != to_match, f"¢ not '{to_match}'")
 
 def chars(to_match: str) -> Consume[str]:
-    return predicate(lambda c: c in to_match, f"¢ in '{to_match}'")
+    return predicate(lambda c: c in to_match, f"¢ in '{to_match}'", frozenset(to_match))
 
 def not_chars(to_match: str) -> Consume[str]:
     return predicate(lambda c: c not in to_match, f"¢ not in '{to_match}'")
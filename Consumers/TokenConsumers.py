@@ -1,7 +1,11 @@
 from .GenericConsumers import predicate
 
+def token_type(t):
+    """the key tokens are dispatched on, see Consume.first"""
+    return t.token
+
 def token(to_match):
-    return predicate(lambda t: t.token == to_match, f"{to_match}")
+    return predicate(lambda t: t.token == to_match, f"{to_match}", frozenset([to_match]), token_type)
 
 def not_token(to_match):
     return predicate(lambda t: t.token != to_match, f"!{to_match}")
\ No newline at end of file
@@ -0,0 +1,92 @@
+# Tracing for the Consume engine: how often every named rule of a grammar ran, failed and backtracked, how much of the
+# packrat memo it hit and how long it took. While a Trace is active it puts a recording function in place of the
+# .consume of every rule it knows by name. Combinators look up .consume of their parts on every call, so they run
+# through it without being rebuilt, and once the trace ends nothing of it is left in the grammar.
+
+import time
+from types import ModuleType
+
+from . import Consumer
+from .Consumer import Consume, ConsumeSuccess
+
+
+class Rule:
+    """the statistics of one named rule. backtracked: the positions it got past before it failed, which the rule
+    that called it has to go over again. inclusive time only counts the outermost of nested calls of the rule."""
+    __slots__ = ("calls", "failures", "backtracked", "memo_hits", "memo_misses", "inclusive", "exclusive", "active")
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.backtracked = 0
+        self.memo_hits = 0
+        self.memo_misses = 0
+        self.inclusive = 0.0
+        self.exclusive = 0.0
+        self.active = 0
+
+
+class Trace:
+    """Trace(Parser, Lexer) traces the Consume objects of the modules under their names there, keyword arguments add
+    others (Trace(rule=some_consumer)). use it as a context manager around the calls to trace:
+        with Trace(Parser) as trace:
+            Parser.FileParser(tokens, 0)
+        print(trace.report())"""
+    def __init__(self, *modules: ModuleType, clock=time.perf_counter, **consumers: Consume):
+        self.clock = clock
+        self.consumers: dict[str, Consume] = {}
+        seen = set()
+        for name, consumer in [*((name, value) for module in modules for name, value in vars(module).items()), *consumers.items()]:
+            if isinstance(consumer, Consume) and id(consumer) not in seen:
+                seen.add(id(consumer))
+                self.consumers[name] = consumer
+        self.rules = { name: Rule() for name in self.consumers }
+        self.originals = {}
+        self.nested = [0.0] # per running rule, the seconds the rules it called took
+
+    def __enter__(self):
+        for name, consumer in self.consumers.items():
+            self.originals[name] = consumer.consume
+            consumer.consume = self.traced(self.rules[name], consumer.consume)
+        return self
+
+    def __exit__(self, *_):
+        for name, consumer in self.consumers.items():
+            consumer.consume = self.originals.pop(name)
+
+    def traced(self, rule: Rule, consume):
+        def traced(collection, pos):
+            memo = Consumer._memo_table
+            hit = memo is not None and (consume, pos) in memo # .memo() keys its results by its consume function
+            rule.memo_hits += hit
+            rule.calls += 1
+            rule.active += 1
+            self.nested.append(0.0)
+            start = self.clock()
+            try:
+                result = consume(collection, pos)
+            finally:
+                elapsed = self.clock() - start
+                rule.exclusive += elapsed - self.nested.pop()
+                self.nested[-1] += elapsed
+                rule.active -= 1
+                if not rule.active:
+                    rule.inclusive += elapsed
+            if memo is not None and not hit and (consume, pos) in memo:
+                rule.memo_misses += 1
+            if not isinstance(result, ConsumeSuccess):
+                rule.failures += 1
+                rule.backtracked += result.progress - pos
+            return result
+        return traced
+
+    def report(self) -> str:
+        """the rules that ran, sorted by exclusive time."""
+        width = max([len(name) for name in self.rules] + [4])
+        lines = [f"{'rule':<{width}} {'calls':>8} {'failed':>8} {'backtracked':>11} {'memo hits':>9} {'inclusive':>11} {'exclusive':>11}"]
+        for name, rule in sorted(self.rules.items(), key=lambda item: -item[1].exclusive):
+            if not rule.calls:
+                continue
+            memo = f"{rule.memo_hits / (rule.memo_hits + rule.memo_misses):>8.0%}" if rule.memo_hits + rule.memo_misses else f"{'-':>8}"
+            lines.append(f"{name:<{width}} {rule.calls:>8} {rule.failures:>8} {rule.backtracked:>11} {memo:>9} "
+                         f"{rule.inclusive * 1000:>9.2f}ms {rule.exclusive * 1000:>9.2f}ms")
+        return "\n".join(lines)
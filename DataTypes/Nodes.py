@@ -1,145 +1,256 @@
+import operator
 from dataclasses import dataclass
 from typing import Type
 
 from DataTypes.Tokens import Token
 
 
-class Node: pass
+# slots: large programs have millions of nodes, without them every one of them carries a __dict__.
+# __repr__ and __eq__ work like the ones dataclass generates, but are shared by all nodes: generating them for every
+# node class took about a third of the time importing the interpreter takes.
+class Node:
+    __slots__ = ()
 
+    def __repr__(self):
+        return f"{type(self).__qualname__}({', '.join(f'{name}={getattr(self, name)!r}' for name in self.__match_args__)})"
 
-@dataclass
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__match_args__)
+
+    def __reduce__(self):
+        # pickled as a constructor call, about twice as fast as the __getstate__ and __setstate__ slots=True generates.
+        # trees are pickled for the .bangc cache and sent between processes by ParallelParser.
+        return type(self), tuple(getattr(self, name) for name in self.__match_args__)
+
+# where the Linker found a name: (number of functions out, slot in that function's frame). see Linker.FrameScope
+type Address = tuple[int, int]
+
+# the type fields of expressions (other than Literal) are filled in by the Linker: the python type they evaluate to,
+# None where it is not known or not always the same. see Linker.infer
+
+
+@dataclass(slots=True, repr=False, eq=False)
 class Literal(Node):
     value: Token
     type: Type
 
-@dataclass
+@dataclass(slots=True, repr=False, eq=False)
 class UnaryMinus(Node):
     value: Node
+    type: Type | None = None
 
-@dataclass
+@dataclass(slots=True, repr=False, eq=False)
 class UnaryBang(Node):
     value: Node
+    type: Type | None = None
 
-@dataclass
+@dataclass(slots=True, repr=False, eq=False)
 class BinaryPlus(Node):
     left: Node
     right: Node
+    type: Type | None = None
 
-@dataclass
+@dataclass(slots=True, repr=False, eq=False)
 class BinaryMinus(Node):
     left: Node
     right: Node
+    type: Type | None = None
 
-@dataclass
+@dataclass(slots=True, repr=False, eq=False)
 class BinaryStar(Node):
     left: Node
     right: Node
+    type: Type | None = None
 
-@dataclass
+@dataclass(slots=True, repr=False, eq=False)
 class BinarySlash(Node):
     left: Node
     right: Node
+    type: Type | None = None
+
+@dataclass(slots=True, repr=False, eq=False)
+class BinaryPercent(Node):
+    left: Node
+    right: Node
+    type: Type | None = None
 
-@dataclass
+@dataclass(slots=True, repr=False, eq=False)
 class BinaryLeftShift(Node):
     left: Node
     right: Node
+    type: Type | None = None
 
-@dataclass
+@dataclass(slots=True, repr=False, eq=False)
 class BinaryRightShift(Node):
     left: Node
     right: Node
+    type: Type | None = None
 
-@dataclass
+@dataclass(slots=True, repr=False, eq=False)
 class BinaryLessThan(Node):
     left: Node
     right: Node
+    type: Type | None = None
 
-@dataclass
+@dataclass(slots=True, repr=False, eq=False)
 class BinaryLessEquals(Node):
     left: Node
     right: Node
+    type: Type | None = None
 
-@dataclass
+@dataclass(slots=True, repr=False, eq=False)
 class BinaryGreaterThan(Node):
     left: Node
     right: Node
+    type: Type | None = None
 
-@dataclass
+@dataclass(slots=True, repr=False, eq=False)
 class BinaryGreaterEquals(Node):
     left: Node
     right: Node
+    type: Type | None = None
 
-@dataclass
+@dataclass(slots=True, repr=False, eq=False)
 class BinaryEquals(Node):
     left: Node
     right: Node
+    type: Type | None = None
 
-@dataclass
+@dataclass(slots=True, repr=False, eq=False)
 class BinaryNotEquals(Node):
     left: Node
     right: Node
+    type: Type | None = None
+
+@dataclass(slots=True, repr=False, eq=False)
+class BinaryAnd(Node):
+    left: Node
+    right: Node
+    type: Type | None = None
+
+@dataclass(slots=True, repr=False, eq=False)
+class BinaryOr(Node):
+    left: Node
+    right: Node
+    type: Type | None = None
 
 # this is the base identifier when its not surrounded by other identifying shit like var/val/fun
-@dataclass
+@dataclass(slots=True, repr=False, eq=False)
 class Reference(Node):
     name: Token
+    address: Address | None = None
+    type: Type | None = None
 
-@dataclass
+@dataclass(slots=True, repr=False, eq=False)
 class Block(Node):
     stmts: list[Node]
 
-@dataclass
+@dataclass(slots=True, repr=False, eq=False)
 class FunctionDeclaration(Node):
     name: Token # = Identifier
     args: list[Token] # = Identifiers
     body: Block
+    address: Address | None = None
+    size: int | None = None # of the frame for a call, filled in by the Linker
+    reads: list[Address] | None = None # the outer vals and functions it reads if it is pure, see Linker.Frame
 
-@dataclass
+@dataclass(slots=True, repr=False, eq=False)
 class AnonymousFunction(Node):
     args: list[Token]
     body: Block
+    size: int | None = None
 
-@dataclass
+@dataclass(slots=True, repr=False, eq=False)
 class VariableDeclaration(Node):
     name: Token
     value: Node
+    address: Address | None = None
 
-@dataclass
+@dataclass(slots=True, repr=False, eq=False)
 class ValueDeclaration(Node):
     name: Token
     value: Node
+    address: Address | None = None
 
-@dataclass
+@dataclass(slots=True, repr=False, eq=False)
 class VariableAssignment(Node):
     name: Token
     value: Node
+    address: Address | None = None
 
-@dataclass
+@dataclass(slots=True, repr=False, eq=False)
 class While(Node):
     condition: Node | Token
     stmt: Node
 
-@dataclass
+@dataclass(slots=True, repr=False, eq=False)
 class Else(Node):
     stmt: Node
 
-@dataclass
+@dataclass(slots=True, repr=False, eq=False)
 class If(Node):
     cond: Node | Token
     stmt: Node
     otherwise: Else | None = None
 
-@dataclass
+@dataclass(slots=True, repr=False, eq=False)
 class Return(Node):
     value: Node | None = None
 
-@dataclass
+@dataclass(slots=True, repr=False, eq=False)
 class FunctionCall(Node):
     callee: Node
     args: list[Node]
+    type: Type | None = None
 
+@dataclass(slots=True, repr=False, eq=False)
+class TailCall(FunctionCall):
+    """a call whose value the function returns right away (return f(...)), the Linker marks these.
+    the evaluators run it in place of the function that returns it instead of nesting another call."""
 
-@dataclass
+
+@dataclass(slots=True, repr=False, eq=False)
 class File(Node):
-    stmts: list[Node]
\ No newline at end of file
+    stmts: list[Node]
+    size: int | None = None # of the global frame
+
+
+# what the operator nodes do, the evaluators apply these (the Linker to find the types of their results).
+UnaryOperators = {
+    UnaryMinus: operator.neg,
+    UnaryBang: operator.not_,
+}
+
+BinaryOperators = {
+    BinaryPlus: operator.add,
+    BinaryMinus: operator.sub,
+    BinaryStar: operator.mul,
+    BinarySlash: operator.truediv,
+    BinaryPercent: operator.mod,
+    BinaryLeftShift: operator.lshift,
+    BinaryRightShift: operator.rshift,
+    BinaryLessThan: operator.lt,
+    BinaryLessEquals: operator.le,
+    BinaryGreaterThan: operator.gt,
+    BinaryGreaterEquals: operator.ge,
+    BinaryEquals: operator.eq,
+    BinaryNotEquals: operator.ne,
+    BinaryAnd: operator.and_,
+    BinaryOr: operator.or_,
+}
+
+
+def children(tree) -> list[Node]:
+    """the nodes directly below tree."""
+    match tree:
+        case Node():
+            result = []
+            for name in tree.__match_args__: # the fields, but a lot faster than dataclasses.fields
+                match getattr(tree, name):
+                    case Node() as child: result.append(child)
+                    case list() as items: result.extend(item for item in items if isinstance(item, Node))
+            return result
+        case _:
+            return []
@@ -1,124 +1,240 @@
+from collections import OrderedDict
+
 import Lib
-from DataTypes.Scopes import *
 from DataTypes.Nodes import *
-from Linker import FunctionCallable
+from Linker import FunctionCallable, enclosing, call_frame
 
 class ReturnException(Exception):
+    """a return outside of any function, there is no call to hand its value to."""
+    def __init__(self, value):
+        self.value = value
+
+
+# what a statement evaluates to when it ran a return. Block, If, Else and While hand it on
+# until it reaches the FunctionCall, which is much cheaper than raising and unwinding an exception.
+class Signal:
+    __slots__ = ()
+
+class Returned(Signal):
+    __slots__ = ("value",)
     def __init__(self, value):
         self.value = value
 
+class TailCalled(Signal):
+    """return f(...): the call that is being returned from calls f next, with this frame."""
+    __slots__ = ("function", "frame")
+    def __init__(self, function, frame):
+        self.function = function
+        self.frame = frame
+
+
+def prepare_call(frame, callee, args):
+    """the function callee evaluates to and the frame for calling it with args."""
+    match evaluate(frame, callee):
+        case FunctionCallable(slots, body) as function:
+            la = len(args)
+            ls = len(slots)
+            match Lib.compare(la, ls):
+                case Lib.Ordering.LESS: raise Exception(f"Not enough arguments given, expected {ls}, got {la}")
+                case Lib.Ordering.GREATER: raise Exception(f"Too many arguments given, expected {ls}, got {la}")
+                case Lib.Ordering.EQUAL:
+                    return function, call_frame(function, [evaluate(frame, arg) for arg in args])
+        case _:
+            raise Exception(f"Illegal callee: {callee}")
+
+
+def hashable(value):
+    """value as part of a memo key. python considers 1, 1.0 and true equal, bang code can tell them apart.
+    functions are told apart by identity, the memo keeps them alive so no other function gets their id."""
+    if type(value) is int or type(value) is str:
+        return value
+    if isinstance(value, FunctionCallable):
+        return FunctionCallable, id(value)
+    return type(value), value
+
+
+class Memo:
+    """a bounded LRU cache for calls of pure functions (the ones the Linker gave reads).
+    a call is keyed by the function, its arguments and the values of the outer vals and functions it reads.
+    functions that keep missing (like add(a, b) in a loop) are not worth the keys, after patience calls
+    with less than one hit for every four misses they are not memoized anymore. (fib(n) hits about half the time)"""
+    def __init__(self, size: int = 4096, patience: int = 256):
+        self.size = size
+        self.patience = patience
+        self.enabled = True
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.functions = {} # id(function) -> [its hits, its misses] while it is on probation
+
+    def call(self, function: FunctionCallable, frame: list, run):
+        """the result of run(function, frame), frame being a fresh call frame for function."""
+        values = [function, *frame[1:len(function.slots) + 1], *(enclosing(function.frame, depth - 1)[slot] for depth, slot in function.reads)]
+        key = tuple(map(hashable, values))
+        entry = self.entries.get(key)
+        counts = self.functions.setdefault(id(function), [0, 0])
+        if entry is not None:
+            self.hits += 1
+            counts[0] += 1
+            self.entries.move_to_end(key)
+            return entry[0]
+        self.misses += 1
+        counts[1] += 1
+        if len(self.functions) > self.size: # functions declared in calls are new every time
+            self.functions.clear()
+        elif counts[0] + counts[1] >= self.patience:
+            del self.functions[id(function)]
+            if counts[0] * 4 < counts[1]:
+                function.reads = None # this instance is not memoized anymore
+        result = run(function, frame)
+        self.entries[key] = result, values
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        self.entries.clear()
+        self.functions.clear()
+        self.hits = self.misses = 0
+
+    def report(self) -> str:
+        return f"memo: {self.hits} hits, {self.misses} misses, {len(self.entries)} of {self.size} entries"
+
+memo = Memo() # shared by the backends, memo.enabled = False turns it off
+
+
+def run_call(function: FunctionCallable, frame: list):
+    while True: # once per tail call, so they use no python stack
+        signal = evaluate(frame, function.body)
+        if type(signal) is Returned:
+            return signal.value
+        if type(signal) is not TailCalled:
+            return None
+        function, frame = signal.function, signal.frame
+
 
 # technically eval and exec
-def evaluate(scope, tree):
+def evaluate(frame, tree):
 
     match tree:
         case Literal(value, t):
             return value.literal
 
         case UnaryMinus(value):
-            return -evaluate(scope, value)
+            return -evaluate(frame, value)
 
         case UnaryBang(value):
-            return not evaluate(scope, value)
+            return not evaluate(frame, value)
 
         case BinaryPlus(left, right):
-            return evaluate(scope, left) + evaluate(scope, right)
+            return evaluate(frame, left) + evaluate(frame, right)
 
         case BinaryMinus(left, right):
-            return evaluate(scope, left) - evaluate(scope, right)
+            return evaluate(frame, left) - evaluate(frame, right)
 
         case BinaryStar(left, right): # ✔
-            return evaluate(scope, left) * evaluate(scope, right)
+            return evaluate(frame, left) * evaluate(frame, right)
 
         case BinarySlash(left, right):
-            return evaluate(scope, left) / evaluate(scope, right)
+            return evaluate(frame, left) / evaluate(frame, right)
+
+        case BinaryPercent(left, right):
+            return evaluate(frame, left) % evaluate(frame, right)
 
         case BinaryLeftShift(left, right):
-            return evaluate(scope, left) << evaluate(scope, right)
+            return evaluate(frame, left) << evaluate(frame, right)
 
         case BinaryRightShift(left, right):
-            return evaluate(scope, left) >> evaluate(scope, right)
+            return evaluate(frame, left) >> evaluate(frame, right)
 
         case BinaryLessThan(left, right):
-            return evaluate(scope, left) < evaluate(scope, right)
+            return evaluate(frame, left) < evaluate(frame, right)
 
         case BinaryLessEquals(left, right):
-            return evaluate(scope, left) <= evaluate(scope, right)
+            return evaluate(frame, left) <= evaluate(frame, right)
 
         case BinaryGreaterThan(left, right):
-            return evaluate(scope, left) > evaluate(scope, right)
+            return evaluate(frame, left) > evaluate(frame, right)
 
         case BinaryGreaterEquals(left, right):
-            return evaluate(scope, left) >= evaluate(scope, right)
+            return evaluate(frame, left) >= evaluate(frame, right)
 
         case BinaryEquals(left, right):
-            return evaluate(scope, left) == evaluate(scope, right)
+            return evaluate(frame, left) == evaluate(frame, right)
 
         case BinaryNotEquals(left, right):
-            return evaluate(scope, left) != evaluate(scope, right)
+            return evaluate(frame, left) != evaluate(frame, right)
+
+        case BinaryAnd(left, right):
+            return evaluate(frame, left) & evaluate(frame, right)
+
+        case BinaryOr(left, right):
+            return evaluate(frame, left) | evaluate(frame, right)
 
         case If(cond, stmt, otherwise):
-            if evaluate(scope, cond):
-                evaluate(scope, stmt)
-            else:
-                evaluate(scope, otherwise)
+            signal = evaluate(frame, stmt if evaluate(frame, cond) else otherwise)
+            if isinstance(signal, Signal):
+                return signal
 
         case Else(stmt):
-            evaluate(scope, stmt)
+            return evaluate(frame, stmt)
 
         case While(cond, stmt):
-            while evaluate(scope, cond):
-                evaluate(scope, stmt)
+            while evaluate(frame, cond):
+                signal = evaluate(frame, stmt)
+                if isinstance(signal, Signal):
+                    return signal
 
         case Block(stmts):
-            block_scope = Scope(scope, {})
             for stmt in stmts:
-                evaluate(block_scope, stmt)
+                signal = evaluate(frame, stmt)
+                if isinstance(signal, Signal):
+                    return signal
+
+        case Return(TailCall(callee, args)):
+            return TailCalled(*prepare_call(frame, callee, args))
 
         case Return(expr):
-            raise ReturnException(value= evaluate(scope, expr))
+            return Returned(evaluate(frame, expr))
 
-        case ValueDeclaration(name, value):
-            scope[name.lexeme] = evaluate(scope, value)
+        case ValueDeclaration(_, value, address):
+            frame[address[1]] = evaluate(frame, value)
 
-        case VariableDeclaration(name, value):
-            scope[name.lexeme] = evaluate(scope, value)
+        case VariableDeclaration(_, value, address):
+            frame[address[1]] = evaluate(frame, value)
 
-        case VariableAssignment(name, value):
+        case VariableAssignment(_, value, address):
             # this is always safe since the linker takes care of illegal assignments
-            scope[name.lexeme] = evaluate(scope, value)
+            depth, slot = address
+            enclosing(frame, depth)[slot] = evaluate(frame, value)
 
-        case Reference(name):
+        case Reference(_, address):
             # similar to assignment, linker nags you about illegal references
-            return scope[name.lexeme]
+            depth, slot = address
+            return enclosing(frame, depth)[slot]
 
-        case FunctionDeclaration(name, args, body):
-            scope[name.lexeme] = FunctionCallable(args, body)
+        case FunctionDeclaration(_, args, body, address, size, reads):
+            frame[address[1]] = FunctionCallable(args, body, size=size, frame=frame, reads=reads)
 
-        case AnonymousFunction(args, body):
-            return FunctionCallable(args, body)
+        case AnonymousFunction(args, body, size):
+            return FunctionCallable(args, body, size=size, frame=frame)
 
-        case File(stmts):
+        case File(stmts, size):
+            frame.extend([None] * (size - len(frame)))
             match stmts:
                 case [single]:
-                    return evaluate(scope, single)
+                    result = evaluate(frame, single)
+                    if isinstance(result, Signal):
+                        raise ReturnException(value= result.value)
+                    return result
                 case [*multiple]:
                     for stmt in multiple:
-                        evaluate(scope, stmt)
+                        signal = evaluate(frame, stmt)
+                        if isinstance(signal, Signal):
+                            raise ReturnException(value= signal.value)
 
         case FunctionCall(callee, args):
-            match evaluate(scope, callee):
-                case FunctionCallable(slots, body):
-                    la = len(args)
-                    ls = len(slots)
-                    match Lib.compare(la, ls):
-                        case Lib.Ordering.LESS: raise Exception(f"Not enough arguments given, expected {ls}, got {la}")
-                        case Lib.Ordering.GREATER: raise Exception(f"Too many arguments given, expected {ls}, got {la}")
-                        case Lib.Ordering.EQUAL:
-                            temp_scope = Scope(scope, { slot.lexeme: evaluate(scope, args[i]) for i, slot in enumerate(slots) })
-                            try:
-                                evaluate(temp_scope, body)
-                            except ReturnException as re:
-                                return re.value
-                case _:
-                    raise Exception(f"Illegal callee: {callee}")
\ No newline at end of file
+            function, temp_frame = prepare_call(frame, callee, args)
+            if function.reads is not None and memo.enabled:
+                return memo.call(function, temp_frame, run_call)
+            return run_call(function, temp_frame)
\ No newline at end of file
@@ -1,29 +1,50 @@
+import argparse
+import contextlib
+import importlib
+import io
 import sys
+from collections.abc import Iterable
 
-import Evaluator
-import Lexer
-import Lib
-import Parser
-import Linker
-from Consumers.Consumer import ConsumeSuccess, ConsumeError
+# nothing of the interpreter is imported up front, so --help and argument errors don't wait for it. the rest is imported
+# where it is first used, the parser (its grammar is built on import) and the backends through lazy.
+# Benchmarks/Startup.py keeps track.
 
 
 class Interpreter:
-    def __init__(self, tokenizer, parser, linker, evaluator):
+    def __init__(self, tokenizer, parser, linker, evaluator, optimizer=None, budget=None):
+        """with a Budget.Budget every script runs on the VM, whatever the evaluator, and is charged to the budget."""
         self.tokenizer = tokenizer
         self.parser = parser
         self.linker = linker
+        self.optimizer = optimizer
+        self.budget = budget
+        if budget is not None: # the VM is the one evaluator that can stop a script in the middle of a run
+            import VM
+            evaluator = lambda frame, tree: VM.evaluate(frame, tree, budget)
         self.evaluator = evaluator
-        self.linker_scope = Linker.Scope(None, {})
-        self.eval_scope = Linker.Scope(None, {})
-    def interpret(self, source: str):
+        import Linker
+        self.linker_scope = Linker.global_scope()
+        self.eval_frame = Linker.global_frame()
+
+    def link(self, parsed):
+        """resolves parsed in the global scope, then optimizes it if there is an optimizer."""
+        return self.optimize(self.resolve(parsed))
+
+    def resolve(self, parsed):
+        """parsed resolved in the global scope, the tree the .bangc cache stores."""
+        return self.linker(self.linker_scope, parsed)
+
+    def optimize(self, linked):
+        return linked if self.optimizer is None else self.optimizer(linked)
+
+    def parse(self, source: str):
+        """the parsed File, or the error of the tokenizer or parser."""
+        from Consumers.Consumer import ConsumeSuccess, ConsumeError
         match self.tokenizer(source, 0):
             case ConsumeSuccess([], tokenized, _):
                 match self.parser(tokenized, 0):
                     case ConsumeSuccess([], parsed, _):
-                        linked = self.linker(self.linker_scope, parsed)
-                        result = self.evaluator(self.eval_scope, linked)
-                        return result
+                        return parsed
 
                     case ConsumeError(rest, desc, pos):
                         return ConsumeError(rest, desc, pos)
@@ -31,13 +52,102 @@ class Interpreter:
             case ConsumeError(rest, desc, pos):
                 return ConsumeError(rest, desc, pos)
 
+    def interpret(self, source: str):
+        from Consumers.Consumer import ConsumeError
+        match self.parse(source):
+            case ConsumeError() | None as error:
+                return error
+            case parsed:
+                return self.evaluator(self.eval_frame, self.link(parsed))
+
+    async def interpret_async(self, source: str, interval: int = 1000):
+        """like interpret, but gives control back to the event loop after every interval loop iterations and calls,
+        so long running scripts don't block it and can be cancelled. always runs on the VM, the one evaluator that can
+        stop in the middle of a run and pick it up again. parsing and linking still happen in one go."""
+        import asyncio
+        import Bytecode
+        import VM
+        from Consumers.Consumer import ConsumeError
+        match self.parse(source):
+            case ConsumeError() | None as error:
+                return error
+            case parsed:
+                steps = VM.execute(Bytecode.compile_file(self.link(parsed)), self.eval_frame, interval, self.budget)
+        try:
+            while True:
+                next(steps)
+                await asyncio.sleep(0) # raises CancelledError here when the task was cancelled
+        except StopIteration as done:
+            return done.value
+
+    def interpret_file(self, path: str, source: str):
+        """like interpret, but takes the linked tree from the .bangc cache next to the file at path if it is current,
+        and writes it otherwise. that only works for a fresh interpreter, linking depends on what was declared before."""
+        import Cache
+        from Consumers.Consumer import ConsumeError
+        fresh = not self.linker_scope.members
+        match Cache.load(Cache.path_of(path), source) if fresh else None:
+            case (linked, scope):
+                self.linker_scope = scope
+            case None:
+                match self.parse(source):
+                    case ConsumeError() | None as error:
+                        return error
+                    case parsed:
+                        linked = self.resolve(parsed)
+                        if fresh:
+                            Cache.store(Cache.path_of(path), source, linked, self.linker_scope)
+        return self.evaluator(self.eval_frame, self.optimize(linked))
+
+    def disassemble(self, source: str):
+        """the bytecode the VM would run for source, as a listing."""
+        import Bytecode
+        from Consumers.Consumer import ConsumeError
+        match self.parse(source):
+            case ConsumeError() | None as error:
+                return error
+            case parsed:
+                return Bytecode.disassemble(Bytecode.compile_file(self.link(parsed)))
+
+    def interpret_stream(self, tokens: Iterable):
+        """like interpret, but parses, links and evaluates one top level declaration at a time while pulling tokens lazily.
+        a declaration comes with the statements up to the next one (see Parser.declarations), so a file of statements
+        without declarations is still read in one go. a ConsumeError that tokens returns once exhausted, like the one of
+        CompiledLexer.stream when it gets stuck, is returned before the piece it cut short runs."""
+        import Parser
+        from Consumers.Consumer import ConsumeSuccess, ConsumeError
+        from DataTypes.Nodes import File
+        result, count, end = None, 0, []
+        def pulled():
+            end.append((yield from tokens))
+        for start, chunk in Parser.declarations(pulled()):
+            match end:
+                case [ConsumeError() as error]:
+                    return error
+            match self.parser(chunk, start):
+                case ConsumeSuccess([], File(stmts) as parsed, _):
+                    linked = self.link(parsed)
+                    result = self.evaluator(self.eval_frame, linked)
+                    count += len(stmts)
+
+                case ConsumeError(rest, desc, pos):
+                    return ConsumeError(rest, desc, pos)
+
+                case _:
+                    return None
+        match end:
+            case [ConsumeError() as error]: # before the first token already
+                return error
+        return result if count == 1 else None
+
 
 def repl(interpreter):
+    import Lib
     print(*[c + '#' for c in Lib.Colors], sep='')
     print(f"{Lib.NAME}{Lib.Colors[17]}Welcome to the interactive environment. enter ~ to exit.")
     while (line := input('> ')) != '~':
         try:
-            result = interpreter.interpret(list(line))
+            result = interpreter.interpret(line)
             print(Lib.Colors[9], result, Lib.ColorOff, sep='')
         except Exception as e:
             print(Lib.Colors[0], e, Lib.ColorOff, sep='')
@@ -47,19 +157,112 @@ def repl(interpreter):
 def noop(a):
     return a
 
+def load(path: str):
+    """imports the module of path ("module.name") and returns the name from it."""
+    module, name = path.rsplit(".", 1)
+    return getattr(importlib.import_module(module), name)
+
+def lazy(path: str):
+    """the function at path, its module is imported when it is called the first time."""
+    function = None
+    def call(*args):
+        nonlocal function
+        if function is None:
+            function = load(path)
+        return function(*args)
+    return call
+
+# both produce the same tokens, the compiled one is a lot faster.
+Lexers = {
+    "compiled": "CompiledLexer.TokenLexer",
+    "combinator": "Lexer.TokenLexer",
+}
+
+# same here, the closure compiler and the VM do the dispatch on node types only once per node instead of every time it runs.
+Evaluators = {
+    "closure": "ClosureCompiler.evaluate",
+    "vm": "VM.evaluate",
+    "tree": "Evaluator.evaluate",
+}
+
 def main():
-    interpreter = Interpreter(Lexer.TokenLexer, Parser.FileParser, Linker.resolve, Evaluator.evaluate)
-    match sys.argv:
-        case [_]:
+    arguments = argparse.ArgumentParser(description="Use with a source file, direct source string or on its own.")
+    arguments.add_argument("source_or_file", nargs="?", help="starts the REPL when left out")
+    arguments.add_argument("--lexer", choices=Lexers.keys(), default="compiled")
+    arguments.add_argument("--evaluator", choices=Evaluators.keys(), help="closure unless --profile or a limit picks one")
+    arguments.add_argument("--dis", action="store_true", help="print the bytecode the vm evaluator runs instead of running it")
+    arguments.add_argument("-O", dest="optimize", action="store_true", help="run the Optimizer passes on the linked tree and print what they removed to stderr")
+    arguments.add_argument("--no-memo", action="store_true", help="do not memoize calls of pure functions")
+    arguments.add_argument("--memo-stats", action="store_true", help="print the hits and misses of the memo for pure functions to stderr")
+    arguments.add_argument("--no-cache", action="store_true", help="neither read nor write the .bangc cache next to the file")
+    arguments.add_argument("--stream", action="store_true", help="read, lex and run the file one top level declaration (with the statements up to the next one) at a time (always uses the compiled lexer)")
+    arguments.add_argument("--parse-workers", type=int, metavar="N", help="parse the top level declarations of large files in N worker processes")
+    arguments.add_argument("--profile", action="store_true", help="run on the tree evaluator without the memo and print the time spent per function and node class to stderr")
+    arguments.add_argument("--profile-stacks", metavar="FILE", help="with --profile, also write the call stacks in collapsed format for flame graphs")
+    arguments.add_argument("--max-steps", type=int, metavar="N", help="stop with an error after N loop iterations and calls (runs on the vm evaluator)")
+    arguments.add_argument("--max-depth", type=int, metavar="N", help="stop with an error when more than N calls run at the same time (runs on the vm evaluator)")
+    arguments.add_argument("--max-memory", type=int, metavar="BYTES", help="stop with an error when the frames of the script hold roughly more than BYTES (runs on the vm evaluator)")
+    arguments.add_argument("--trace-grammar", action="store_true", help="print calls, failures, backtracking and time of every parser rule to stderr (and lexer rule with --lexer combinator), files from the .bangc cache are not parsed")
+    args = arguments.parse_args()
+    limits = args.max_steps, args.max_depth, args.max_memory
+    if args.profile and limits != (None, None, None):
+        arguments.error("--profile runs on the tree evaluator, --max-steps, --max-depth and --max-memory on the vm")
+    if args.profile and args.evaluator not in (None, "tree"):
+        arguments.error(f"--profile runs on the tree evaluator, not --evaluator {args.evaluator}")
+    if limits != (None, None, None) and args.evaluator not in (None, "vm"):
+        arguments.error(f"--max-steps, --max-depth and --max-memory run on the vm evaluator, not --evaluator {args.evaluator}")
+
+    memo = load("Evaluator.memo") if args.no_memo or args.memo_stats else None # on by default, once it is imported
+    if args.no_memo:
+        memo.enabled = False
+    optimizer = load("Optimizer.PassManager")() if args.optimize else None
+    profiler = load("Profiler.Profiler")() if args.profile else None
+    evaluator = load(Evaluators[args.evaluator or "closure"]) if profiler is None else profiler.run
+    parser = lazy("Parser.FileParser") if args.parse_workers is None else load("ParallelParser.FileParser")(args.parse_workers)
+    budget = None if limits == (None, None, None) else load("Budget.Budget")(*limits)
+    interpreter = Interpreter(lazy(Lexers[args.lexer]), parser, lazy("Linker.resolve"), evaluator, optimizer, budget)
+    trace = load("Consumers.Trace.Trace")(importlib.import_module("Parser"), importlib.import_module("Lexer")) if args.trace_grammar else None
+    try:
+        with profiler or contextlib.nullcontext(), trace or contextlib.nullcontext():
+            run(interpreter, args)
+    finally:
+        if optimizer is not None:
+            print(optimizer.report(), file=sys.stderr)
+        if args.memo_stats:
+            print(memo.report(), file=sys.stderr)
+        if profiler is not None:
+            print(profiler.report(), file=sys.stderr)
+            if args.profile_stacks:
+                with open(args.profile_stacks, "w") as file:
+                    file.write(profiler.collapsed())
+        if trace is not None:
+            print(trace.report(), file=sys.stderr)
+
+
+def run(interpreter, args):
+    import CompiledLexer
+    match args.source_or_file:
+        case None:
             repl(interpreter)
-        case [_, source_or_file]:
+        case source_or_file if args.stream:
+            try:
+                with open(source_or_file) as file:
+                    print(interpreter.interpret_stream(CompiledLexer.stream(file)))
+            except FileNotFoundError as _:
+                print(interpreter.interpret_stream(CompiledLexer.stream(io.StringIO(source_or_file))))
+        case source_or_file:
             try:
                 with open(source_or_file) as file:
                     source = file.read()
             except FileNotFoundError as _:
-                source = source_or_file
-            print(interpreter.interpret(list(source)))
-        case [*_]: print("Use with a source file, direct source string or on its own.")
+                print(interpreter.disassemble(source_or_file) if args.dis else interpreter.interpret(source_or_file))
+                return
+            if args.dis:
+                print(interpreter.disassemble(source))
+            elif args.no_cache:
+                print(interpreter.interpret(source))
+            else:
+                print(interpreter.interpret_file(source_or_file, source))
 
 
 if __name__ == "__main__":
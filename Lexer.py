@@ -1,3 +1,5 @@
+import sys
+
 from Lib import collapse, reduce
 from DataTypes.Tokens import Token, TokenType
 from Consumers.Consumer import Consume
@@ -10,8 +12,10 @@ WhitespaceLexer = StringConsumers.chars(" \t\n").continuous()
 
 
 TokenLexers = []
+SimpleTokens = {} # lexeme -> its token, every occurrence shares the same one. also for the compiled lexer
 def SimpleTokenLexer(string, tokentype):
-    c = GenericConsumers.sequence(string, f"{string} Token").penetrate(lambda cs: Token(tokentype, ''.join(cs), None))
+    token = SimpleTokens[string] = Token(tokentype, string, None)
+    c = GenericConsumers.sequence(string, f"{string} Token").penetrate(lambda _: token)
     TokenLexers.append(c)
     return c
 
@@ -68,17 +72,40 @@ Keywords = {
     "let"    :   TokenType.LET
 }
 
+KeywordLiterals = { "true": True, "false": False }
+
+KeywordTokens = { keyword: Token(tokentype, keyword, KeywordLiterals.get(keyword)) for keyword, tokentype in Keywords.items() }
+
+Symbols = {} # the symbol table: name -> its identifier token
+
+def symbol(name):
+    """the one identifier token for name. its lexeme is interned, so scopes can hash and compare it by identity."""
+    if (token := Symbols.get(name)) is None:
+        name = sys.intern(name)
+        token = Symbols[name] = Token(TokenType.IDENTIFIER, name, name)
+    return token
+
 def ident_or_keyword(string):
     string = ''.join(string)
-    if string in Keywords.keys():
-        return Token(Keywords[string], string, None)
-    else: return Token(TokenType.IDENTIFIER, string, string)
+    if string in KeywordTokens:
+        return KeywordTokens[string]
+    else: return symbol(string)
 
 IdentifierKeywordLexer = GenericConsumers \
     .predicate(lambda e: e.isalnum() or e == '_', "Identifier") \
     .continuous() \
     .penetrate(ident_or_keyword)
 
+# these build the tokens for both this and the compiled lexer
+def string_token(quote, string):
+    return Token(TokenType.STRING, quote + string + quote, string)
+
+def number_token(num):
+    return Token(TokenType.NUMBER, num, int(num))
+
+def comment_token(comment):
+    return Token(TokenType.COMMENT, '//' + comment + '\n', comment)
+
 # Possible new thing, interesting if we want more string like syntax pieces
 SingleQuoteLexer = StringConsumers.char("'")
 SingleQuoteStringLexer = StringConsumers \
@@ -87,7 +114,7 @@ SingleQuoteStringLexer = StringConsumers \
     .optional() \
     .bracketed(SingleQuoteLexer, SingleQuoteLexer) \
     .penetrate(collapse) \
-    .penetrate(lambda string: Token(TokenType.STRING, "'" + string + "'", string))
+    .penetrate(lambda string: string_token("'", string))
 
 DoubleQuoteLexer = StringConsumers.char('"')
 DoubleQuoteStringLexer = StringConsumers \
@@ -96,14 +123,14 @@ DoubleQuoteStringLexer = StringConsumers \
     .optional() \
     .bracketed(DoubleQuoteLexer, DoubleQuoteLexer) \
     .penetrate(collapse) \
-    .penetrate(lambda string: Token(TokenType.STRING, '"' + string + '"', string))
+    .penetrate(lambda string: string_token('"', string))
 
 UnderscoreLexer = StringConsumers.char('_')
 DigitLexer: Consume[str] = GenericConsumers.predicate(str.isdigit, "Digit")
 NumberLexer = DigitLexer \
     .delimited_optional(UnderscoreLexer) \
     .penetrate(collapse) \
-    .penetrate(lambda num: Token(TokenType.NUMBER, num, int(num)))
+    .penetrate(number_token)
 
 CommentLexer = StringConsumers \
     .not_chars('\n') \
@@ -111,7 +138,7 @@ CommentLexer = StringConsumers \
     .optional() \
     .bracketed(StringConsumers.string('//'), StringConsumers.char('\n')) \
     .penetrate(collapse) \
-    .penetrate(lambda comment: Token(TokenType.COMMENT, '//' + comment + '\n', comment))
+    .penetrate(comment_token)
 
 # BlockCommentLexer = (
 #         StringConsumers.string('/*')
@@ -122,5 +149,20 @@ CommentLexer = StringConsumers \
 
 TokenLexers.extend([IdentifierKeywordLexer, DoubleQuoteStringLexer, SingleQuoteStringLexer, CommentLexer, NumberLexer])
 
-TokenLexer = reduce(TokenLexers[::-1], Consume.__or__).delimited_optional(WhitespaceLexer)
-"""Converts a string into a list of tokens if possible."""
+# Going through the registry back to front with ordered choice picks the same token as the longest match would,
+# since the two character operators are registered after their one character prefixes and comments after '/'.
+# Numbers and identifiers overlap ('12' is both, '12a' only an identifier) so they keep the longest match between them.
+# They come last: their FIRST sets are unknown, so they are a candidate for every character and would be tried first otherwise.
+def token_lexer() -> Consume[str]:
+    """Converts a string into a list of tokens if possible."""
+    word_lexer = NumberLexer | IdentifierKeywordLexer
+    return reduce([*(lexer for lexer in TokenLexers[::-1] if lexer not in (NumberLexer, IdentifierKeywordLexer)), word_lexer], Consume.__truediv__) \
+        .delimited_optional(WhitespaceLexer)
+
+def __getattr__(name):
+    # TokenLexer is only built once something uses it, CompiledLexer (the default) just needs the tables above.
+    if name == "TokenLexer":
+        global TokenLexer
+        TokenLexer = token_lexer()
+        return TokenLexer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -36,6 +36,8 @@ Colors = [
 
 ColorOff = "\033[0m"
 
+VERSION = "0.1"
+
 NAME = ('\n' +
        Colors[0] + " ▄▄▄▄    ▄▄▄       ███▄    █   ▄████  ▐██▌ " + '\n' +
        Colors[1] + "▓█████▄ ▒████▄     ██ ▀█   █  ██▒ ▀█▒ ▐██▌ " + '\n' +
@@ -65,6 +67,13 @@ def cons(a, b):
         case   l,  [*r] : return [ l, *r]  # Item  List
         case   l,    r  : return [ l,  r]  # Item  Item
 
+def cons_into(items: list, b) -> list:
+    """cons(items, b) for a list we own, extends it in place instead of copying it, so accumulating stays linear."""
+    match b:
+        case [*r]: items.extend(r)
+        case r: items.append(r)
+    return items
+
 def reduce_with_base[T](items: Iterable[T], agg: Callable[[T, T], T], start: T) -> T:
     out = start
     for item in items:
@@ -3,7 +3,11 @@
 # tries resolving references from scope, errors if referencing something that doesnt exist
 
 from __future__ import annotations
-from dataclasses import dataclass
+import functools
+import itertools
+from dataclasses import dataclass, field
+from types import NoneType
+from typing import Callable, Never
 
 import Lib
 from DataTypes.Nodes import *
@@ -15,9 +19,104 @@ from DataTypes.Scopes import *
 class FunctionCallable:
     slots: list[Token] # identifiers
     body: Block
+    compiled: Callable | None = field(default=None, compare=False, repr=False) # the body as a ClosureCompiler closure
+    code: Code | None = field(default=None, compare=False, repr=False) # the body as Bytecode for the VM
+    size: int = 0 # of the frame of a call
+    frame: list | None = field(default=None, compare=False, repr=False) # the frame it was declared in
+    reads: list[Address] | None = field(default=None, compare=False, repr=False) # None unless it is pure, see Frame
 
 class ValueSlot: pass
 
+
+# At runtime every function call (and the file) gets one frame, a list with the enclosing frame in slot 0
+# and everything declared inside the function in the others. blocks do not get frames of their own,
+# their declarations just take the next free slots of the function they are in.
+# While linking a function its frame also collects whether the function is pure: its result only depends on
+# its arguments and the vals and functions outside of it that it reads, so calls with the same values can be memoized.
+# It is not once it assigns to or reads a var outside of it, calls anything but a pure function by name,
+# or declares a function (that function holds on to the frame of the call, state the memo would share).
+@dataclass
+class Frame:
+    size: int = 1
+    reads: list[Address] | None = field(default_factory=list) # None once the function is impure
+    function: FunctionCallable | None = None # the function being linked, calls to itself are pure
+
+@dataclass
+class FrameScope(Scope):
+    """a scope that also knows the slots of its names in the frame it belongs to."""
+    frame: Frame = field(default_factory=Frame)
+    slots: dict = field(default_factory=dict)
+
+    def declare(self, name: str) -> Address:
+        """the slot for a declaration, declaring the same name again in a scope reuses it."""
+        if name not in self.slots:
+            self.slots[name] = self.frame.size
+            self.frame.size += 1
+        return 0, self.slots[name]
+
+    def address(self, name: str) -> Address:
+        depth, scope = 0, self
+        while name not in scope.members:
+            if scope.parent.frame is not scope.frame:
+                depth += 1
+            scope = scope.parent
+        return depth, scope.slots[name]
+
+    def read(self, address: Address):
+        if self.frame.reads is not None and address not in self.frame.reads:
+            self.frame.reads.append(address)
+
+    def impure(self):
+        self.frame.reads = None
+
+    def read_through(self, callee: Reference):
+        """a call of the pure function callee: its result also depends on what callee reads, so that is read here too.
+        those reads count from inside callee, one frame further out than where callee was declared."""
+        function = self[callee.name.lexeme]
+        if function is self.frame.function: # calls to itself read what it reads
+            return
+        for depth, slot in function.reads:
+            self.read((callee.address[0] + depth - 1, slot))
+
+    def pure_callee(self, callee: Node) -> bool:
+        match callee:
+            case Reference(name):
+                match self[name.lexeme]:
+                    case FunctionCallable() as function:
+                        return function.reads is not None or function is self.frame.function
+        return False
+
+    def in_function(self) -> bool:
+        scope = self
+        while scope.parent is not None:
+            scope = scope.parent
+        return scope.frame is not self.frame
+
+def function_scope(scope: FrameScope, args: list[Token]) -> FrameScope:
+    """the scope of a function body, the arguments come first in its frame."""
+    inner = FrameScope(scope, {}, Frame(len(args) + 1))
+    for i, arg in enumerate(args):
+        inner.members[arg.lexeme], inner.slots[arg.lexeme] = ValueSlot(), i + 1
+    return inner
+
+def global_scope() -> FrameScope:
+    return FrameScope(None, {})
+
+def global_frame() -> list:
+    """the runtime frame for global_scope, evaluating a File grows it to the size the Linker gave it."""
+    return [None]
+
+def enclosing(frame: list, depth: int) -> list:
+    for _ in range(depth):
+        frame = frame[0]
+    return frame
+
+def call_frame(function: FunctionCallable, args: list) -> list:
+    """a fresh frame for a call, the arguments go into the first slots after the frame the function was declared in."""
+    frame = [function.frame, *args]
+    frame.extend([None] * (function.size - len(frame)))
+    return frame
+
 def resolve(scope, tree: Node):
     match tree:
 
@@ -44,6 +143,9 @@ def resolve(scope, tree: Node):
         case BinarySlash(left, right):
             return BinarySlash(resolve(scope, left), resolve(scope, right))
 
+        case BinaryPercent(left, right):
+            return BinaryPercent(resolve(scope, left), resolve(scope, right))
+
         case BinaryLeftShift(left, right):
             return BinaryLeftShift(resolve(scope, left), resolve(scope, right))
 
@@ -68,6 +170,12 @@ def resolve(scope, tree: Node):
         case BinaryNotEquals(left, right):
             return BinaryNotEquals(resolve(scope, left), resolve(scope, right))
 
+        case BinaryAnd(left, right):
+            return BinaryAnd(resolve(scope, left), resolve(scope, right))
+
+        case BinaryOr(left, right):
+            return BinaryOr(resolve(scope, left), resolve(scope, right))
+
         case Else(stmt):
             return Else(resolve(scope, stmt))
 
@@ -78,38 +186,54 @@ def resolve(scope, tree: Node):
             return While(resolve(scope, cond), resolve(scope, stmt))
 
         case VariableDeclaration(name, value): # ✔
-            scope[name.lexeme] = VariableDeclaration(name, resolve(scope, value))
+            value = resolve(scope, value)
+            scope[name.lexeme] = VariableDeclaration(name, value, scope.declare(name.lexeme))
             return scope[name.lexeme]
 
         case ValueDeclaration(name, value):
-            scope[name.lexeme] = ValueDeclaration(name, resolve(scope, value))
+            value = resolve(scope, value)
+            scope[name.lexeme] = ValueDeclaration(name, value, scope.declare(name.lexeme))
             return scope[name.lexeme]
 
         case VariableAssignment(name, value):
             if name.lexeme in scope:
                 match scope[name.lexeme]:
                     case VariableDeclaration(_, _):
-                        return VariableAssignment(name, resolve(scope, value))
+                        address = scope.address(name.lexeme)
+                        if address[0] > 0:
+                            scope.impure()
+                        return VariableAssignment(name, resolve(scope, value), address)
                     case ValueDeclaration(_, _):
                         raise Exception(f"Cannot assign value to '{name.lexeme}' because it is immutable.")
             raise Exception(f"Cannot assign value to '{name.lexeme}' because it does not exist in current scope.")
 
         case AnonymousFunction(args, body):
-            _ = FunctionCallable(args, resolve(Scope(scope, { arg.lexeme: ValueSlot() for arg in args }), body))
-            return AnonymousFunction(args, body)
+            scope.impure()
+            inner = function_scope(scope, args)
+            body = resolve(inner, body)
+            return AnonymousFunction(args, body, inner.frame.size)
 
         case FunctionDeclaration(name, args, body):
-            scope[name.lexeme] = FunctionCallable(args, None) # forward declaration for recursion 🥶
-            scope[name.lexeme].body =  resolve(Scope(scope, { arg.lexeme: ValueSlot() for arg in args }), body)
-            return FunctionDeclaration(name, args, body)
+            scope.impure()
+            address = scope.declare(name.lexeme)
+            function = scope[name.lexeme] = FunctionCallable(args, None) # forward declaration for recursion 🥶
+            inner = function_scope(scope, args)
+            inner.frame.function = function
+            function.body = resolve(inner, body)
+            function.reads = inner.frame.reads
+            return FunctionDeclaration(name, args, function.body, address, inner.frame.size, inner.frame.reads)
 
         case Block(stmts):
-            block_scope = Scope(scope, {})
+            block_scope = FrameScope(scope, {}, scope.frame)
             return Block([resolve(block_scope, stmt) for stmt in stmts])
 
         case FunctionCall(callee, args):
             # we can only do analysis when we know that the callee is a callable.
             res = resolve(scope, callee)
+            if not scope.pure_callee(res):
+                scope.impure()
+            else:
+                scope.read_through(res)
             match res:
                 case FunctionCallable(slots, _):
                     ls = len(slots)
@@ -123,24 +247,198 @@ def resolve(scope, tree: Node):
 
         case Reference(name): # ✔
             if name.lexeme in scope:
-                return Reference(name) # scope[name.lexeme]
+                address = scope.address(name.lexeme)
+                if address[0] > 0: # outside of the function
+                    match scope[name.lexeme]:
+                        case ValueSlot(): pass # arguments of enclosing functions are fixed for a function
+                        case VariableDeclaration(): scope.impure()
+                        case _: scope.read(address)
+                return Reference(name, address)
             else:
                 raise Exception(f"Cannot reference '{name.lexeme}' because it does not exist in current scope.")
 
         case Return(expr):
-            return Return(resolve(scope, expr))
+            match resolve(scope, expr):
+                case FunctionCall(callee, args) if scope.in_function():
+                    # nothing is left to do in this function after the call, so it can replace it
+                    return Return(TailCall(callee, args))
+                case expr:
+                    return Return(expr)
 
         case File(stmts):
-            return File([resolve(scope, stmt) for stmt in stmts])
+            first = scope.frame.size # the slots before it belong to the files linked before this one (in the REPL)
+            stmts = [resolve(scope, stmt) for stmt in stmts]
+            return infer(File(stmts, scope.frame.size), first)
 
     return tree
 
+
+# Types: once a File is resolved, the Linker works out what every expression in it evaluates to and fills in the
+# type fields of its nodes. Types are python types, None where they are not known or not always the same.
+# They flow from the literals through vals and vars (everything written to a slot in the file, in any order), into the
+# arguments of functions that are only ever called by name, and out of functions through what they return.
+# An operator applied to types it does not take is an error while linking, whether that code would ever run or not.
+# What an operator does never depends on the types, evaluators only use them for faster code (ClosureCompiler for ints).
+
+# values of every type an operator can be applied to, to find out what it does with them. some operators depend on the
+# values too (1 << -1, "%d" % 5), an operator only does not take types if it fails with a TypeError for all of them.
+Samples = {
+    int: [0, 1, -1, 2],
+    bool: [False, True],
+    str: ["", "a", "%s", "%d"],
+    float: [0.0, 0.5, -1.5],
+    NoneType: [None],
+}
+
+Operators = UnaryOperators | BinaryOperators
+
+def join(a, b):
+    """the type of something that is either of type a or b. Never is the type of something without any values (yet)."""
+    if a is Never:
+        return b
+    if b is Never:
+        return a
+    return a if a is b else None
+
+@functools.cache
+def applied(operator: type, operands: tuple) -> tuple:
+    """the type of the result of operator on values of the operand types (None if it is not always the same),
+    and the TypeError it raises if it takes none of them."""
+    if operator is BinaryPercent and operands[0] is str:
+        return str, None # formatting, whether it works depends on the format string
+    results, error = set(), None
+    for values in itertools.product(*(Samples[operand] for operand in operands)):
+        try:
+            results.add(type(Operators[operator](*values)))
+        except TypeError as raised:
+            error = error or raised
+        except Exception: # the types are fine, the values are not (1 / 0)
+            pass
+    if not results:
+        return None, error
+    return (results.pop() if len(results) == 1 else None), None
+
+def operated(tree, operands: list) -> tuple:
+    """the type of the result of the operator tree for the types of its operands,
+    and the error it raises if it does not take them (the type is not known then)."""
+    if None in operands or any(operand not in Samples for operand in operands if operand is not Never):
+        return None, None
+    if Never in operands:
+        return Never, None
+    return applied(type(tree), tuple(operands))
+
+def always_returns(tree) -> bool:
+    match tree:
+        case Return(): return True
+        case Block(stmts): return any(always_returns(stmt) for stmt in stmts)
+        case If(_, stmt, Else(otherwise)): return always_returns(stmt) and always_returns(otherwise)
+    return False
+
+def infer(file: File, first: int = 1) -> File:
+    """fills in the types of the expressions in file, see above. they are worked out again until none of them changes,
+    every one only goes from Never to a type to None. then the errors of the operators in the last round are raised.
+    the slots of the file before first were declared by files linked before it, what they hold is not known."""
+    frame_of = lambda frames, depth, slot: (id(frames[-1 - depth]), slot)
+    writes = {} # (frame, slot) -> the nodes writing to it. frames are the function (or file) nodes they belong to
+    escaped = set() # slots that are referenced other than by calling them
+
+    def collect(tree, frames):
+        match tree:
+            case ValueDeclaration(_, _, (depth, slot)) | VariableDeclaration(_, _, (depth, slot)) \
+               | VariableAssignment(_, _, (depth, slot)) | FunctionDeclaration(_, _, _, (depth, slot), _):
+                writes.setdefault(frame_of(frames, depth, slot), []).append(tree)
+            case Reference(_, (depth, slot)):
+                escaped.add(frame_of(frames, depth, slot))
+            case FunctionCall(Reference(), args):
+                for arg in args:
+                    collect(arg, frames)
+                return
+        inner = [*frames, tree] if isinstance(tree, (FunctionDeclaration, AnonymousFunction)) else frames
+        for child in children(tree):
+            collect(child, inner)
+
+    collect(file, [file])
+    types = { key: Never for key in writes if key[0] != id(file) or key[1] >= first }
+    functions = {} # slot -> the function declared in it, if that is the only thing written to it
+    for key, nodes in writes.items():
+        match nodes:
+            case [FunctionDeclaration(_, args) as function] if key in types:
+                functions[key] = function
+                if key not in escaped: # it is only called by name, so its arguments are what those calls pass
+                    types |= { (id(function), i + 1): Never for i in range(len(args)) }
+    returns = { id(function): Never for function in functions.values() }
+    changed, errors = True, []
+
+    def give(table: dict, key, t):
+        nonlocal changed
+        if key in table and (joined := join(table[key], t)) is not table[key]:
+            table[key], changed = joined, True
+
+    def reference(frames, depth, slot):
+        key = frame_of(frames, depth, slot)
+        if depth and frames[-1 - depth] is file and any(isinstance(node, (VariableDeclaration, VariableAssignment)) for node in writes.get(key, ())):
+            return None # vars of the file can be assigned by the next one before the function runs
+        return types.get(key)
+
+    def walk(tree, frames):
+        """the type of tree, while it puts the types of everything it writes, passes and returns into the tables."""
+        match tree:
+            case Literal(_, t):
+                return t
+            case Reference(_, (depth, slot)):
+                t = reference(frames, depth, slot)
+            case Node() if type(tree) in Operators:
+                t, error = operated(tree, [walk(child, frames) for child in children(tree)])
+                if error is not None:
+                    errors.append(error)
+            case FunctionCall(callee, args):
+                passed = [walk(arg, frames) for arg in args]
+                walk(callee, frames)
+                match callee:
+                    case Reference(_, (depth, slot)) if frame_of(frames, depth, slot) in functions:
+                        function = functions[frame_of(frames, depth, slot)]
+                        for i, argument in enumerate(passed):
+                            give(types, (id(function), i + 1), argument)
+                        t = returns[id(function)]
+                    case _:
+                        t = None
+            case ValueDeclaration(_, value, (depth, slot)) | VariableDeclaration(_, value, (depth, slot)) | VariableAssignment(_, value, (depth, slot)):
+                give(types, frame_of(frames, depth, slot), walk(value, frames))
+                return None
+            case FunctionDeclaration(_, _, body, (depth, slot), _):
+                give(types, frame_of(frames, depth, slot), FunctionCallable)
+                walk(body, [*frames, tree])
+                if not always_returns(body):
+                    give(returns, id(tree), NoneType)
+                return None
+            case AnonymousFunction(_, body):
+                walk(body, [*frames, tree])
+                return FunctionCallable
+            case Return(value):
+                # a return on its own parses with an empty list as its value
+                give(returns, id(frames[-1]), walk(value, frames) if isinstance(value, Node) else NoneType)
+                return None
+            case _:
+                for child in children(tree):
+                    walk(child, frames)
+                return None
+        tree.type = None if t is Never else t
+        return t
+
+    while changed:
+        changed, errors = False, []
+        walk(file, [file])
+    if errors:
+        raise Exception(f"Type error: {errors[0]}.")
+    return file
+
+
 @dataclass
 class Value(Node):
     val: int
 
 if __name__ == "__main__":
-    s = Scope(None, {})
+    s = global_scope()
 
     import Lexer, Parser
     with open("sample.bang") as f:
@@ -0,0 +1,173 @@
+# Passes over the linked tree that run between Linker.resolve and the evaluator.
+# Each pass takes a tree and returns an equivalent one, the PassManager runs them until none of them changes anything.
+
+from dataclasses import fields
+from typing import Callable
+
+import Lexer
+from DataTypes.Nodes import *
+from DataTypes.Tokens import Token, TokenType
+
+type Pass = Callable[[Node], Node]
+
+
+def rebuild(tree, f):
+    """a copy of tree with f applied to its child nodes, including the ones in lists.
+    f may return None for a statement it removes: it is dropped from lists and replaced with an empty block elsewhere."""
+    if not isinstance(tree, Node):
+        return tree
+    values = []
+    for field in fields(tree):
+        match getattr(tree, field.name):
+            case Node() as child:
+                child = f(child)
+                values.append(Block([]) if child is None else child)
+            case list() as items:
+                values.append([child for child in (f(item) if isinstance(item, Node) else item for item in items) if child is not None])
+            case value:
+                values.append(value)
+    return type(tree)(*values)
+
+
+def count(tree) -> int:
+    """the number of nodes in tree."""
+    return 1 + sum(count(child) for child in children(tree)) if isinstance(tree, Node) else 0
+
+
+def literal(value) -> Literal:
+    """the literal node that evaluates to value."""
+    match value:
+        case bool(): token = Lexer.KeywordTokens["true" if value else "false"]
+        case None: token = Lexer.KeywordTokens["null"]
+        case str(): token = Token(TokenType.STRING, f'"{value}"', value)
+        case _: token = Token(TokenType.NUMBER, str(value), value)
+    return Literal(token, type(value))
+
+
+def huge(tree, left, right) -> bool:
+    """whether computing tree could take a lot of time or memory, which is left to runtime since it might never run."""
+    match tree:
+        case BinaryLeftShift(): return isinstance(right, int) and right > 256
+        case BinaryStar():
+            return isinstance(left, str) and isinstance(right, int) and len(left) * right > 1024 \
+                or isinstance(right, str) and isinstance(left, int) and len(right) * left > 1024
+    return False
+
+
+def fold(tree):
+    """constant folding: operators applied to literals become the literal of their result.
+    anything that raises (like 1 / 0 or 1 << -1) is left alone, so it still raises at runtime."""
+    tree = rebuild(tree, fold)
+    match tree:
+        case UnaryMinus(Literal(value, _)) | UnaryBang(Literal(value, _)):
+            try:
+                return literal(UnaryOperators[type(tree)](value.literal))
+            except Exception:
+                return tree
+        case Node() if type(tree) in BinaryOperators:
+            match tree.left, tree.right:
+                case Literal(left, _), Literal(right, _) if not huge(tree, left.literal, right.literal):
+                    try:
+                        return literal(BinaryOperators[type(tree)](left.literal, right.literal))
+                    except Exception:
+                        return tree
+    return tree
+
+
+def block(stmt) -> Block:
+    return stmt if isinstance(stmt, Block) else Block([stmt])
+
+
+def prune(tree):
+    """dead branches: an If / Else on a literal condition is replaced by the branch that runs, a While(false) by nothing.
+    blocks that only group statements inside another block are merged into it, the Linker already resolved their scopes.
+    the branch stays wrapped in a block, a File with a single If still evaluates to None."""
+    tree = rebuild(tree, prune)
+    match tree:
+        case If(Literal(value, _), stmt, otherwise):
+            if value.literal:
+                return block(stmt)
+            return None if otherwise is None else block(otherwise.stmt)
+        case While(Literal(value, _), _) if not value.literal:
+            return None
+        case Block(stmts):
+            return Block([inner for stmt in stmts for inner in (stmt.stmts if isinstance(stmt, Block) else [stmt])])
+    return tree
+
+
+def unreachable(tree):
+    """statements after a Return in the same block never run."""
+    tree = rebuild(tree, unreachable)
+    match tree:
+        case Block(stmts):
+            for i, stmt in enumerate(stmts):
+                if isinstance(stmt, Return):
+                    return Block(stmts[:i + 1])
+    return tree
+
+
+def propagate(tree):
+    """val propagation: references to a val that is declared with a literal become that literal.
+    A slot only counts as constant when that declaration is the only thing writing to it in its frame, see Linker.FrameScope.
+    references are only replaced after the declaration ran, and vals of the file only in its top level code,
+    the functions of this file might still be called after a later one (in the REPL) declared the same name again."""
+    writes = {} # (frame, slot) -> the nodes writing to it. frames are the function (or file) nodes they belong to
+
+    def collect(tree, frames):
+        match tree:
+            case ValueDeclaration(_, _, (depth, slot)) | VariableDeclaration(_, _, (depth, slot)) \
+               | VariableAssignment(_, _, (depth, slot)) | FunctionDeclaration(_, _, _, (depth, slot), _):
+                writes.setdefault((id(frames[-1 - depth]), slot), []).append(tree)
+        inner = [*frames, tree] if isinstance(tree, (FunctionDeclaration, AnonymousFunction)) else frames
+        for child in children(tree):
+            collect(child, inner)
+
+    declared = set()
+
+    def replace(tree, frames):
+        match tree:
+            case Reference(_, (depth, slot)) if depth < len(frames) - 1 or len(frames) == 1:
+                key = (id(frames[-1 - depth]), slot)
+                match writes.get(key):
+                    case [ValueDeclaration(_, Literal() as value, _)] if key in declared:
+                        return value
+            case ValueDeclaration(name, value, (_, slot) as address):
+                value = replace(value, frames)
+                declared.add((id(frames[-1]), slot))
+                return ValueDeclaration(name, value, address)
+        inner = [*frames, tree] if isinstance(tree, (FunctionDeclaration, AnonymousFunction)) else frames
+        return rebuild(tree, lambda child: replace(child, inner))
+
+    collect(tree, [tree])
+    return replace(tree, [tree])
+
+
+Passes: list[tuple[str, Pass]] = [
+    ("constant folding", fold),
+    ("val propagation", propagate),
+    ("dead branches", prune),
+    ("after return", unreachable),
+]
+
+
+class PassManager:
+    """runs its passes in order, and again until the tree does not change anymore. counts the nodes every pass removed."""
+    def __init__(self, passes: list[tuple[str, Pass]] = None, rounds: int = 8):
+        self.passes = Passes if passes is None else passes
+        self.rounds = rounds
+        self.removed = { name: 0 for name, _ in self.passes }
+
+    def __call__(self, tree):
+        for _ in range(self.rounds):
+            before = tree
+            for name, run in self.passes:
+                size = count(tree)
+                tree = run(tree)
+                self.removed[name] += size - count(tree)
+            if tree == before:
+                break
+        return tree
+
+    def report(self) -> str:
+        width = max(len(name) for name in self.removed)
+        return "\n".join(f"{name:<{width}} {removed:>6} nodes removed" for name, removed in self.removed.items())
@@ -0,0 +1,63 @@
+# A parallel front end for large files: the tokens are split in front of the top level declarations (Parser.declarations),
+# the pieces are parsed in worker processes and their statements put back together into one File, in order.
+# Every piece is parsed with the position it starts at, so errors point into the whole file. Linking stays sequential.
+
+from concurrent.futures import ProcessPoolExecutor
+
+import Parser
+from Consumers.Consumer import ConsumeSuccess, ConsumeError, ConsumeResult
+from Consumers.Cursor import Cursor
+from DataTypes.Nodes import File
+from DataTypes.Tokens import Token
+
+
+def pieces(tokens: list[Token], size: int) -> list[tuple[int, list[Token]]]:
+    """the top level declarations of tokens with their positions, neighbours merged until they have size tokens.
+    every piece parses on its own, small ones would cost more to send to a worker than to parse."""
+    result = []
+    for start, chunk in Parser.declarations(tokens):
+        if result and len(result[-1][1]) < size:
+            result[-1][1].extend(chunk)
+        else:
+            result.append((start, chunk))
+    return result
+
+
+def parse_piece(start: int, tokens: list[Token]) -> list | tuple[str, int]:
+    """runs in a worker: the statements of the piece, or the description and position of the error that stopped it.
+    (ConsumeErrors build their descriptions lazily, the functions doing that can't be sent back.)"""
+    match Parser.FileParser(tokens, start):
+        case ConsumeSuccess([], File(stmts), _):
+            return stmts
+        case ConsumeSuccess(rest, _, progress):
+            # continuous() stops at the first declaration that does not parse, that one has the error
+            error = Parser.DeclarationParser(rest, progress)
+            return error.description, error.progress
+        case ConsumeError() as error:
+            return error.description, error.progress
+
+
+class FileParser:
+    """a stand in for Parser.FileParser that parses the pieces of a file in worker processes.
+    it gives the same File, but an error in any declaration instead of a success that stops in front of it.
+    files with less than two pieces are parsed right away."""
+    def __init__(self, workers: int | None = None, size: int = 2048):
+        self.workers = workers
+        self.size = size
+        self.executor = None # started on the first file that is worth it, and kept for the next one
+
+    def __call__(self, tokens: list[Token], pos: int) -> ConsumeResult[Token]:
+        split = pieces(tokens, self.size)
+        if len(split) < 2:
+            return Parser.FileParser(tokens, pos)
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.workers)
+        rest = self.executor.map(parse_piece, [pos + start for start, _ in split[1:]], [chunk for _, chunk in split[1:]])
+        statements = []
+        for result in [parse_piece(pos + split[0][0], split[0][1]), *rest]: # the first one here, while the workers start
+            match result:
+                case list() as stmts:
+                    statements += stmts
+                case (description, progress):
+                    return ConsumeError(Cursor(tokens, progress - pos), description, progress)
+        return ConsumeSuccess(Cursor(tokens, len(tokens)), File(statements), pos + len(tokens))
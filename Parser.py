@@ -1,9 +1,10 @@
 from types import NoneType
-from typing import Iterable, Self
+from typing import Iterable, Iterator, Self
 
 from Consumers import GenericConsumers
 from Consumers.TokenConsumers import token
 from Consumers.Consumer import Consume, ConsumeError, ConsumeSuccess, ConsumeResult
+from Consumers.Cursor import Cursor
 from DataTypes.Nodes import *
 from DataTypes.Tokens import TokenType
 from Lib import reduce
@@ -13,12 +14,12 @@ StatementParser = Consume(lambda: None) # same here.
 DeclarationParser = Consume(lambda: None) # and here.
 
 PrimaryParser = token(TokenType.IDENTIFIER).penetrate(Reference) \
-              | token(TokenType.NUMBER).penetrate(lambda v: Literal(v, int)) \
-              | token(TokenType.STRING).penetrate(lambda v: Literal(v, str)) \
-              | token(TokenType.NULL).penetrate(lambda v: Literal(v, NoneType)) \
-              | token(TokenType.TRUE).penetrate(lambda v: Literal(v, bool)) \
-              | token(TokenType.FALSE).penetrate(lambda v: Literal(v, bool)) \
-              | (token(TokenType.LEFTPARENTOKEN) >> ExpressionParser << token(TokenType.RIGHTPARENTOKEN))
+              / token(TokenType.NUMBER).penetrate(lambda v: Literal(v, int)) \
+              / token(TokenType.STRING).penetrate(lambda v: Literal(v, str)) \
+              / token(TokenType.NULL).penetrate(lambda v: Literal(v, NoneType)) \
+              / token(TokenType.TRUE).penetrate(lambda v: Literal(v, bool)) \
+              / token(TokenType.FALSE).penetrate(lambda v: Literal(v, bool)) \
+              / (token(TokenType.LEFTPARENTOKEN) >> ExpressionParser << token(TokenType.RIGHTPARENTOKEN))
 
 CommaDelExprsParser = token(TokenType.LEFTPARENTOKEN) >> ExpressionParser.delimited(token(TokenType.COMMA)).optional() << token(TokenType.RIGHTPARENTOKEN)
 
@@ -34,60 +35,59 @@ def parse_function_call(collection, pos):
                         curr = ConsumeSuccess(rest, FunctionCall(curr.parsed, parsed), pos)
             return curr
 
-FunctionCallParser = Consume(parse_function_call)
+FunctionCallParser = Consume(parse_function_call, PrimaryParser.first, PrimaryParser.key).memo()
 
-unaries = lambda tokens: reduce([unary_parser(tkn, node) for tkn, node in tokens], Consume.__or__)
+unaries = lambda tokens: reduce([unary_parser(tkn, node) for tkn, node in tokens], Consume.__truediv__)
 
 unary_parser = lambda to_match, node: (token(to_match) >> FunctionCallParser).penetrate(node)
 
-def binary(element, to_match: TokenType, node) -> Consume[Token]:
-    operator = token(to_match)
-    def consume(collection: Iterable[Token], pos: int) -> ConsumeResult[Token]:
-        match element(collection, pos):
+UnaryTokens = [(TokenType.BANG, UnaryBang),
+               (TokenType.MINUS, UnaryMinus)]
+UnaryParser = (unaries(UnaryTokens) / FunctionCallParser).memo()
+
+# operator -> (precedence, node), higher binds tighter. all of them are left associative.
+BinaryOperators = {
+    TokenType.STAR:          (7, BinaryStar),
+    TokenType.SLASH:         (7, BinarySlash),
+    TokenType.PERCENT:       (7, BinaryPercent),
+    TokenType.PLUS:          (6, BinaryPlus),
+    TokenType.MINUS:         (6, BinaryMinus),
+    TokenType.LEFTSHIFT:     (5, BinaryLeftShift),
+    TokenType.RIGHTSHIFT:    (5, BinaryRightShift),
+    TokenType.LESS:          (4, BinaryLessThan),
+    TokenType.LESSEQUALS:    (4, BinaryLessEquals),
+    TokenType.GREATER:       (4, BinaryGreaterThan),
+    TokenType.GREATEREQUALS: (4, BinaryGreaterEquals),
+    TokenType.DEQUALS:       (3, BinaryEquals),
+    TokenType.NOTEQUALS:     (3, BinaryNotEquals),
+    TokenType.AND:           (2, BinaryAnd),
+    TokenType.OR:            (1, BinaryOr),
+}
+
+def binaries(operand: Consume[Token], operators: dict) -> Consume[Token]:
+    """precedence climbing over the operators table: every operand is parsed exactly once,
+    an operator only takes the operands to its right that are bound tighter than itself."""
+    def climb(collection: Iterable[Token], pos: int, minimum: int) -> ConsumeResult[Token]:
+        match operand.consume(collection, pos):
             case ConsumeError(rest, desc, pos):
                 return ConsumeError(rest, desc, pos)
-            case ConsumeSuccess(rest, parsed, pos):
-                curr = ConsumeSuccess(rest, parsed, pos)
+            case ConsumeSuccess(rest, left, pos):
                 while True:
-                    match operator(rest, pos):
-                        case ConsumeError(_, _, _):
-                            break
-                        case ConsumeSuccess(rest, _, pos):
-                            match element(rest, pos):
+                    match Cursor.of(rest):
+                        case Cursor(buffer, offset) as cursor if offset < len(buffer) and buffer[offset].token in operators:
+                            precedence, node = operators[buffer[offset].token]
+                            if precedence < minimum: break
+                            match climb(cursor.advance(), pos + 1, precedence + 1):
                                 case ConsumeError(rest, desc, pos):
                                     return ConsumeError(rest, desc, pos)
-                                case ConsumeSuccess(rest, parsed, pos):
-                                    curr = ConsumeSuccess(rest, node(curr.parsed, parsed), pos)
-                return curr
-    return Consume(consume)
-
-binaries = lambda element, operators: reduce([binary(element, op, node) for op, node in operators], Consume.__or__)
-
-UnaryTokens = [(TokenType.BANG, UnaryBang),
-               (TokenType.MINUS, UnaryMinus)]
-UnaryParser = unaries(UnaryTokens) | FunctionCallParser
-
-FactorTokens = [(TokenType.STAR, BinaryStar),
-                (TokenType.SLASH, BinarySlash)]
-FactorParser = binaries(UnaryParser, FactorTokens)
-
-TermTokens = [(TokenType.PLUS, BinaryPlus),
-              (TokenType.MINUS, BinaryMinus)]
-TermParser = binaries(FactorParser, TermTokens)
-
-ShiftTokens = [(TokenType.LEFTSHIFT, BinaryLeftShift),
-               (TokenType.RIGHTSHIFT, BinaryRightShift)]
-ShiftParser = binaries(TermParser, ShiftTokens)
-
-ComparisonTokens = [(TokenType.LESS, BinaryLessThan),
-                    (TokenType.LESSEQUALS, BinaryLessEquals),
-                    (TokenType.GREATER, BinaryGreaterThan),
-                    (TokenType.GREATEREQUALS, BinaryGreaterEquals)]
-ComparisonParser = binaries(ShiftParser, ComparisonTokens)
+                                case ConsumeSuccess(rest, right, pos):
+                                    left = node(left, right)
+                        case _:
+                            break
+                return ConsumeSuccess(rest, left, pos)
+    return Consume(lambda collection, pos: climb(collection, pos, 0), operand.first, operand.key)
 
-EqualityTokens = [(TokenType.DEQUALS, BinaryEquals),
-                  (TokenType.NOTEQUALS, BinaryNotEquals)]
-EqualityParser = binaries(ComparisonParser, EqualityTokens)
+BinaryParser = binaries(UnaryParser, BinaryOperators).memo()
 
 ArgsParser = token(TokenType.LEFTPARENTOKEN) >> token(TokenType.IDENTIFIER).delimited(token(TokenType.COMMA)).optional() << token(TokenType.RIGHTPARENTOKEN)
 
@@ -121,15 +121,39 @@ ClassDeclParser = ...
 
 
 
-# here we override the instance method and not the entire instance.
+# here we override the instance method (and FIRST set) and not the entire instance.
 # this overrides the referenced function and supplies the actual definition,
 # which allows us to create infinitely nested non left or right recursive (primitive?) parsers.
-ExpressionParser.consume = (AnonFunctionParser | EqualityParser).consume
-StatementParser.consume = (IfParser | WhileParser | ReturnParser | VariableAssParser | BlockParser | ExpressionParser).consume
-DeclarationParser.consume = (FunctionDeclParser | ValueDeclParser | VariableDeclParser | StatementParser).consume
-
-
-FileParser = DeclarationParser.continuous().penetrate(File)
+# the alternatives are ordered so that none of them can succeed on a prefix of a later one,
+# e.g. an assignment 'a = b' before the expression 'a' and an anonymous function '(a) -> b' before the expression '(a)'.
+ExpressionParser.define((AnonFunctionParser / BinaryParser).memo())
+StatementParser.define((IfParser / WhileParser / ReturnParser / VariableAssParser / BlockParser / ExpressionParser).memo())
+DeclarationParser.define(FunctionDeclParser / ValueDeclParser / VariableDeclParser / StatementParser)
+
+
+# packrat: the .memo() rules above share one memo table per call, which is dropped again once the file is parsed.
+FileParser = DeclarationParser.continuous().penetrate(File).packrat()
+
+
+Openers = {TokenType.LEFTPARENTOKEN, TokenType.LEFTBRAKETTOKEN, TokenType.LEFTBRACETOKEN}
+Closers = {TokenType.RIGHTPARENTOKEN, TokenType.RIGHTBRACKETTOKEN, TokenType.RIGHTBRACETOKEN}
+DeclarationTokens = {TokenType.FUN, TokenType.VAL, TokenType.VAR}
+
+def declarations(tokens: Iterable[Token]) -> Iterator[tuple[int, list[Token]]]:
+    """splits a token stream in front of every fun / val / var outside of brackets, which always start a new top level
+    declaration. so each piece (with the statements following its declaration) parses with FileParser on its own,
+    without ever holding more than one of them. yields the pieces with the position of their first token.
+    other statements are not split off, their end is only known by parsing them (if is an expression as well): the
+    statements before the first declaration, and those between two declarations, stay in one piece with it."""
+    chunk, start, depth = [], 0, 0
+    for i, t in enumerate(tokens):
+        if depth == 0 and t.token in DeclarationTokens and chunk:
+            yield start, chunk
+            chunk, start = [], i
+        depth += (t.token in Openers) - (t.token in Closers)
+        chunk.append(t)
+    if chunk:
+        yield start, chunk
 
 # Expressions
 # function call: expr ( exprs )
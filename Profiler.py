@@ -0,0 +1,123 @@
+# A profiler for the tree evaluator: counts and times evaluations per node class, and calls per bang function.
+# It works by putting its own evaluate in place of Evaluator.evaluate, which the evaluator looks up for every
+# recursive evaluation. Nothing of it runs unless it is installed, the evaluator itself does not know about it.
+
+import time
+
+import Evaluator
+from DataTypes.Nodes import FunctionDeclaration, AnonymousFunction
+
+FILE = "<file>"
+ANONYMOUS = "<anonymous>"
+
+
+class Entry:
+    """count, inclusive and exclusive seconds of a node class or function.
+    inclusive time only counts the outermost of nested evaluations of the same entry, recursion would count it again."""
+    __slots__ = ("count", "inclusive", "exclusive", "active")
+    def __init__(self):
+        self.count = 0
+        self.inclusive = 0.0
+        self.exclusive = 0.0
+        self.active = 0
+
+
+class Profiler:
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.original = Evaluator.evaluate
+        self.nodes: dict[str, Entry] = {}
+        self.functions: dict[str, Entry] = {}
+        self.stacks: dict[tuple[str, ...], float] = {} # function names from the file down -> exclusive seconds
+        self.bodies: dict[int, tuple[str, object]] = {} # id of a function body -> the name of its function, and the body to keep the id taken
+        self.stack = [] # the bang call stack
+        self.nested = [0.0] # per running evaluation, the seconds its nested evaluations took
+        self.calls = [0.0] # per running function call, the seconds its nested calls took
+
+    def install(self):
+        """routes every evaluation of the tree evaluator through the profiler until uninstall.
+        the memo is off meanwhile, calls it answered would not be evaluated and so not counted or timed."""
+        Evaluator.evaluate = self.evaluate
+        self.memo, Evaluator.memo.enabled = Evaluator.memo.enabled, False
+
+    def uninstall(self):
+        Evaluator.evaluate = self.original
+        Evaluator.memo.enabled = self.memo
+
+    def __enter__(self):
+        self.install()
+        return self
+
+    def __exit__(self, *_):
+        self.uninstall()
+
+    def evaluate(self, frame, tree):
+        match tree:
+            case FunctionDeclaration(name, _, body):
+                self.bodies[id(body)] = name.lexeme, body
+            case AnonymousFunction(_, body):
+                self.bodies[id(body)] = ANONYMOUS, body
+        function = self.bodies.get(id(tree)) # a body is only evaluated when its function is called
+        if function is not None:
+            return self.call(function[0], frame, tree)
+        return self.node(frame, tree)
+
+    def run(self, frame, tree):
+        """evaluates tree like Evaluator.evaluate, the time outside of functions goes to <file>."""
+        return self.call(FILE, frame, tree)
+
+    def node(self, frame, tree):
+        entry = self.nodes.get(type(tree).__name__)
+        if entry is None:
+            entry = self.nodes[type(tree).__name__] = Entry()
+        entry.count += 1
+        entry.active += 1
+        self.nested.append(0.0)
+        start = self.clock()
+        try:
+            return self.original(frame, tree)
+        finally:
+            elapsed = self.clock() - start
+            entry.exclusive += elapsed - self.nested.pop()
+            self.nested[-1] += elapsed
+            entry.active -= 1
+            if not entry.active:
+                entry.inclusive += elapsed
+
+    def call(self, function: str, frame, body):
+        entry = self.functions.get(function)
+        if entry is None:
+            entry = self.functions[function] = Entry()
+        entry.count += 1
+        entry.active += 1
+        self.stack.append(function)
+        self.calls.append(0.0)
+        start = self.clock()
+        try:
+            return self.node(frame, body)
+        finally:
+            elapsed = self.clock() - start
+            exclusive = elapsed - self.calls.pop()
+            self.calls[-1] += elapsed
+            entry.exclusive += exclusive
+            stack = tuple(self.stack)
+            self.stacks[stack] = self.stacks.get(stack, 0.0) + exclusive
+            self.stack.pop()
+            entry.active -= 1
+            if not entry.active:
+                entry.inclusive += elapsed
+
+    def report(self) -> str:
+        """the functions, then the node classes, each sorted by exclusive time."""
+        lines = [f"{'function':<24} {'calls':>9} {'inclusive':>11} {'exclusive':>11}"]
+        for name, entry in sorted(self.functions.items(), key=lambda item: -item[1].exclusive):
+            lines.append(f"{name:<24} {entry.count:>9} {entry.inclusive * 1000:>9.2f}ms {entry.exclusive * 1000:>9.2f}ms")
+        lines.append(f"\n{'node':<24} {'count':>9} {'inclusive':>11} {'exclusive':>11}")
+        for name, entry in sorted(self.nodes.items(), key=lambda item: -item[1].exclusive):
+            lines.append(f"{name:<24} {entry.count:>9} {entry.inclusive * 1000:>9.2f}ms {entry.exclusive * 1000:>9.2f}ms")
+        return "\n".join(lines)
+
+    def collapsed(self) -> str:
+        """the call stacks in the collapsed format flame graph tools read: names joined by ; and the microseconds
+        spent in the last of them."""
+        return "\n".join(f"{';'.join(stack)} {round(seconds * 1_000_000)}" for stack, seconds in self.stacks.items())
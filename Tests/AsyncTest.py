@@ -0,0 +1,60 @@
+import asyncio
+
+import ClosureCompiler
+import CompiledLexer
+import Interpreter
+import Linker
+import Parser
+from Consumers.Consumer import ConsumeError
+
+
+def interpreter():
+    return Interpreter.Interpreter(CompiledLexer.TokenLexer, Parser.FileParser, Linker.resolve, ClosureCompiler.evaluate)
+
+fib = "fun fib(n) -> { if n < 2 return n return fib(n - 1) + fib(n - 2) } val r = fib(15)"
+count = "var i = 0 while i < {} i = i + 1"
+forever = "var i = 0 while true i = i + 1"
+
+
+async def ticker(ticks: list):
+    while True:
+        ticks.append(len(ticks))
+        await asyncio.sleep(0)
+
+
+async def main():
+    # the same results as running it right away, and in the same frame
+    first, second = interpreter(), interpreter()
+    assert await first.interpret_async(fib) is None and second.interpret(fib) is None
+    assert first.eval_frame[-1] == second.eval_frame[-1] == 610
+    assert await first.interpret_async("r + 1") == 611
+    assert isinstance(await first.interpret_async("val = 1"), ConsumeError)
+
+    # the loop keeps running other tasks while a script runs: about one tick per interval iterations
+    ticks = []
+    task = asyncio.create_task(ticker(ticks))
+    await interpreter().interpret_async(count.format(10000), interval=100)
+    task.cancel()
+    assert 90 <= len(ticks) <= 110, len(ticks)
+
+    # scripts run side by side on one loop
+    left, right = interpreter(), interpreter()
+    await asyncio.gather(left.interpret_async(count.format(5000), 10), right.interpret_async(fib, 10))
+    assert left.eval_frame[-1] == 5000 and right.eval_frame[-1] == 610
+
+    # cancelled scripts stop, with a timeout as well
+    task = asyncio.create_task(interpreter().interpret_async(forever))
+    await asyncio.sleep(0.05)
+    task.cancel()
+    try:
+        await task
+        assert False
+    except asyncio.CancelledError:
+        assert task.cancelled()
+    try:
+        await asyncio.wait_for(interpreter().interpret_async(forever), 0.05)
+        assert False
+    except TimeoutError:
+        pass
+
+asyncio.run(main())
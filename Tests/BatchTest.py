@@ -0,0 +1,33 @@
+import os
+import tempfile
+
+import Batch
+
+scripts = {
+    "a.bang": "1 + 2",
+    "b.bang": "fun f(n) -> { if n < 2 return n return f(n - 1) + f(n - 2) } val r = f(20)",
+    "c.bang": "val = 3",
+    "d.bang": "1 / 0",
+    "e.bang": "var i = 0 while true i = i + 1",
+    "f.bang": "'con' + 'cat'",
+}
+
+if __name__ == "__main__": # the workers import this module where processes are spawned instead of forked
+    with tempfile.TemporaryDirectory() as directory:
+        for name, source in scripts.items():
+            with open(os.path.join(directory, name), "w") as file:
+                file.write(source)
+        paths = Batch.files([os.path.join(directory, "*.bang"), os.path.join(directory, "missing.bang")])
+        assert [os.path.basename(path) for path in paths] == [*scripts, "missing.bang"]
+
+        lines = list(Batch.run(paths, workers=2, timeout=0.5, chunksize=1))
+        assert [line["file"] for line in lines] == paths # in order, whatever finished first
+        results = [line.get("result", line.get("type")) for line in lines]
+        assert results == [3, None, "ConsumeError", "ZeroDivisionError", "Timeout", "concat", "FileNotFoundError"], results
+        assert 0.5 <= lines[4]["seconds"] < 5
+        assert os.path.exists(paths[0] + "c")
+
+        # the worker that ran a file before runs it again the same way
+        os.remove(paths[0] + "c")
+        first, second = Batch.run([paths[0], paths[0]], workers=1, cache=False)
+        assert first["result"] == second["result"] == 3 and not os.path.exists(paths[0] + "c")
@@ -0,0 +1,68 @@
+import asyncio
+
+import ClosureCompiler
+import CompiledLexer
+import Interpreter
+import Linker
+import Parser
+from Budget import Budget, BudgetExceeded
+
+
+def interpreter(budget=None):
+    return Interpreter.Interpreter(CompiledLexer.TokenLexer, Parser.FileParser, Linker.resolve, ClosureCompiler.evaluate, budget=budget)
+
+def exceeds(budget, *sources):
+    """the BudgetExceeded running sources one after the other raised, None if they all ran."""
+    runner = interpreter(budget)
+    try:
+        for source in sources:
+            runner.interpret(source)
+    except BudgetExceeded as error:
+        return error
+
+count = "var i = 0 while i < {} i = i + 1 i"
+deep = "fun down(n) -> { if n == 0 return 0 return 1 + down(n - 1) } down(%d)"
+grow = "var s = \"\" var i = 0 while true { s = s + \"x\" i = i + 1 }"
+
+
+# without one nothing changes
+assert interpreter().interpret(count.format(100)) is None
+runner = interpreter(Budget())
+runner.interpret(count.format(100))
+assert runner.eval_frame[-1] == 100
+assert runner.budget.steps_used == 100 and runner.budget.remaining() == { "steps": None, "depth": None, "memory": None }
+
+# steps are loop iterations and calls, and the limit is exact
+assert exceeds(Budget(steps=100), count.format(100)) is None
+error = exceeds(Budget(steps=99), count.format(100))
+assert error.limit == "steps" and error.used["steps"] == 100 and error.remaining["steps"] == 0, error
+assert exceeds(Budget(steps=11), deep % 10) is None # the call of down(10) and ten more
+assert exceeds(Budget(steps=10), deep % 10).limit == "steps"
+
+# so is the depth
+assert exceeds(Budget(depth=50), deep % 49) is None
+error = exceeds(Budget(depth=50), deep % 50)
+assert error.limit == "depth" and error.used["depth"] == 51 and error.used["steps"] == 51, error
+assert exceeds(Budget(steps=10000, depth=10), "fun loop(n) -> { return loop(n + 1) } loop(0)").limit == "steps" # tail calls don't go deeper
+
+# memory is rough, but a script that keeps growing is stopped
+error = exceeds(Budget(memory=100_000, interval=100), grow)
+assert error.limit == "memory" and error.used["memory"] > 100_000 and error.remaining["memory"] == 0, error
+
+# budgets add up over everything run with them
+assert exceeds(Budget(steps=250), count.format(100), count.format(100)) is None
+error = exceeds(Budget(steps=250), count.format(100), count.format(100), count.format(100))
+assert error.limit == "steps" and error.used["steps"] == 251, error
+assert "steps 251 of 250" in str(error)
+
+# and they hold on the event loop as well
+async def main():
+    runner = interpreter(Budget(steps=1000))
+    assert await runner.interpret_async(count.format(500), interval=10) is None
+    try:
+        await runner.interpret_async(count.format(501), interval=10)
+        assert False
+    except BudgetExceeded as error:
+        assert error.limit == "steps" and error.used["steps"] == 1001
+
+asyncio.run(main())
@@ -0,0 +1,80 @@
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+
+import Cache
+import ClosureCompiler
+import CompiledLexer
+import Interpreter
+import Linker
+import Parser
+
+
+def interpreter(parser=Parser.FileParser):
+    return Interpreter.Interpreter(CompiledLexer.TokenLexer, parser, Linker.resolve, ClosureCompiler.evaluate)
+
+def unused(tokens, pos):
+    raise Exception("parsed although the cache is current")
+
+source = "fun f(a) -> { return a * 2 } val r = f(21)"
+changed = "fun f(a) -> { return a * 3 } val r = f(21)"
+
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, "some.bang")
+    cache = Cache.path_of(path)
+    assert cache.endswith("some.bangc")
+
+    first = interpreter()
+    first.interpret_file(path, source)
+    assert os.path.exists(cache) and first.eval_frame[-1] == 42
+
+    # current: nothing is parsed, the global scope is the one linking left behind
+    second = interpreter(unused)
+    second.interpret_file(path, source)
+    assert second.eval_frame[-1] == 42
+    second.parser = Parser.FileParser
+    assert second.interpret("val q = f(1) + r") is None and second.eval_frame[-1] == 44
+
+    # stale after the source changed, and written again
+    third = interpreter()
+    third.interpret_file(path, changed)
+    assert third.eval_frame[-1] == 63
+    assert Cache.load(cache, changed) is not None and Cache.load(cache, source) is None
+
+    # anything that is not a cache is ignored
+    with open(cache, "wb") as file:
+        file.write(b"not a cache")
+    fourth = interpreter()
+    fourth.interpret_file(path, source)
+    assert fourth.eval_frame[-1] == 42
+
+    # an interpreter that already declared something links differently, it neither reads nor writes the cache
+    os.remove(cache)
+    fifth = interpreter()
+    fifth.interpret("val x = 1")
+    fifth.interpret_file(path, source)
+    assert not os.path.exists(cache) and fifth.eval_frame[-1] == 42
+
+# every module of the interpreter that lexing, parsing and linking import is part of the version
+imported = subprocess.run([sys.executable, "-c", """if True:
+    import os, sys
+    import CompiledLexer, Lexer, Parser, Linker
+    root = os.getcwd()
+    for module in list(sys.modules.values()):
+        path = getattr(module, "__file__", None) or ""
+        if path.startswith(root + os.sep):
+            print(os.path.relpath(path, root).replace(os.sep, "/"))
+    """], capture_output=True, text=True, check=True).stdout.split()
+assert set(imported) <= set(Cache.Sources), set(imported) - set(Cache.Sources)
+
+# a cache only rebuilds linked trees, whoever wrote it
+class Payload:
+    def __reduce__(self):
+        return print, ("loading this ran code",)
+with tempfile.TemporaryDirectory() as directory:
+    cache = os.path.join(directory, "evil.bangc")
+    with open(cache, "wb") as file:
+        file.write(Cache.MAGIC + Cache.key(source) + pickle.dumps(Payload()))
+    assert Cache.load(cache, source) is None
@@ -0,0 +1,11 @@
+import ClosureCompiler
+import Linker
+from Programs import link
+
+# the compiled body is kept on the function and reused
+scope, frame = Linker.global_scope(), Linker.global_frame()
+ClosureCompiler.evaluate(frame, link("fun f(a) -> { return a }", scope))
+assert frame[1].compiled is not None
+body = frame[1].compiled
+assert ClosureCompiler.evaluate(frame, link("f(3)", scope)) == 3
+assert frame[1].compiled is body
@@ -0,0 +1,36 @@
+import random
+
+import CompiledLexer
+import Lexer
+from Consumers.Consumer import ConsumeSuccess
+
+corpus = [
+    open("sample.bang").read(),
+    "1+2*3",
+    "fun f(a) -> { if a < 2 return 1 else return f(a - 1) }",
+    "\"str\" 'q' // c\n 1_000 == 2 <= 3 << 4 |> -> != ! >= >> = < > - | / //",
+    "12 12a a12 1_2_ _1 1__2 ifx if while(x) { x = x - 1 }",
+    "\"multi\nline\" '' \"\" //\n// no newline",
+    "x $ y",
+    "'unterminated",
+    " leading whitespace",
+    "trailing whitespace \t\n",
+    "a\rb",
+    "ünïcödé ٣ 12٣",
+    "",
+]
+
+# and random soup of the characters that matter to the token definitions
+random.seed(0xBA46)
+alphabet = list("ab_19 \t\n/\"'(){}[]+-*%&|<>=!.?,:$") + ["if ", "fun ", "1_", "//", "->", "|>"]
+corpus += [''.join(random.choices(alphabet, k=random.randint(1, 40))) for _ in range(2000)]
+
+for source in corpus:
+    for collection in [source, list(source)]:
+        expected, actual = Lexer.TokenLexer(collection, 3), CompiledLexer.TokenLexer(collection, 3)
+        assert type(expected) is type(actual) and expected.progress == actual.progress, repr(source)
+        assert list(expected.rest) == list(actual.rest), repr(source)
+        if isinstance(expected, ConsumeSuccess):
+            assert expected.parsed == actual.parsed, repr(source)
+        else:
+            assert expected.description == actual.description, repr(source)
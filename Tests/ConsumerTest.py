@@ -3,4 +3,34 @@ from Consumers.Consumer import Consume, ConsumeSuccess
 # Unconditional Consumption
 c = Consume(lambda collection, pos: ConsumeSuccess(collection[1:], collection[0], pos +1))
 
-assert c("Test", 0) == ConsumeSuccess("est", "T", 1)
\ No newline at end of file
+assert c("Test", 0) == ConsumeSuccess("est", "T", 1)
+
+from Consumers.Cursor import Cursor
+from Consumers.StringConsumers import char
+
+# Rests are views into the original input, not copies
+r = char("T")("Test", 0)
+assert r == ConsumeSuccess("est", "T", 1)
+assert isinstance(r.rest, Cursor) and r.rest.buffer == "Test"
+assert char("e").continuous()(r.rest, r.progress) == ConsumeSuccess("st", ["e"], 2)
+assert char("x")([], 0).description == "¢ 'x' @ 0 $> Input is empty."
+
+# Packrat: memoized rules run once per position inside .packrat(), and normally outside of it
+calls = []
+def counted(collection, pos):
+    calls.append(pos)
+    return char("a").consume(collection, pos)
+a = Consume(counted).memo()
+twice = (a + char("b")) | (a + char("c"))
+assert twice.packrat()("ac", 0) == ConsumeSuccess("", ["a", "c"], 2) and calls == [0]
+assert twice("ac", 0) == ConsumeSuccess("", ["a", "c"], 2) and calls == [0, 0, 0]
+
+# Dispatch: only alternatives whose FIRST set contains the next element are tried, the rest only for the error
+tried = []
+def tracked(c):
+    return Consume(lambda collection, pos: tried.append(c) or char(c).consume(collection, pos), frozenset(c))
+abc = tracked("a") / tracked("b") | tracked("c")
+assert abc.first == frozenset("abc")
+assert abc("b", 0) == ConsumeSuccess("", "b", 1) and tried == ["b"]
+assert abc("x", 0).description == "¢ 'a' @ 0 $> 'x' did not match expected. | ¢ 'b' @ 0 $> 'x' did not match expected. | ¢ 'c' @ 0 $> 'x' did not match expected."
+assert (char("a") + char("b")).first == frozenset("a") and char("a").optional().first is None
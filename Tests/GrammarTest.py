@@ -0,0 +1,74 @@
+from types import NoneType
+
+import Lexer
+import Parser
+from Consumers.Consumer import Consume, ConsumeSuccess, ConsumeError
+from DataTypes.Nodes import *
+from DataTypes.Tokens import Token, TokenType
+from Lib import reduce
+
+# The registry combined with longest match, which is what TokenLexer used to be
+LongestMatchLexer = reduce(Lexer.TokenLexers[::-1], Consume.__or__).delimited_optional(Lexer.WhitespaceLexer)
+
+sources = [
+    open("sample.bang").read(),
+    "1+2*3",
+    "a(b)(c, d)",
+    "fun f(a) -> { if a < 2 return 1 else return f(a - 1) }",
+    "\"str\" 'q' // c\n 1_000 == 2 <= 3 << 4 |> -> != ! >= >> = < > - | / //",
+    "12 12a a12 1_2_ _1 1__2 ifx if while(x) { x = x - 1 }",
+    "x $ y",
+    "'unterminated",
+    " leading whitespace",
+    "",
+]
+
+for source in sources:
+    expected, actual = LongestMatchLexer(source, 0), Lexer.TokenLexer(source, 0)
+    assert type(expected) is type(actual) and expected.progress == actual.progress, source
+    if isinstance(expected, ConsumeSuccess):
+        assert expected.parsed == actual.parsed and list(expected.rest) == list(actual.rest), source
+
+
+def tokens(source):
+    return Lexer.TokenLexer(source, 0).parsed
+
+def parse(source):
+    match Parser.FileParser(tokens(source), 0):
+        case ConsumeSuccess([], parsed, _): return parsed
+        case other: raise AssertionError(other)
+
+ident = lambda name: Token(TokenType.IDENTIFIER, name, name)
+number = lambda value: Literal(Token(TokenType.NUMBER, str(value), value), int)
+ref = lambda name: Reference(ident(name))
+
+assert parse("a = 1 a") == File([VariableAssignment(ident("a"), number(1)), ref("a")])
+assert parse("(a) -> a (b)") == File([AnonymousFunction(ident("a"), FunctionCall(ref("a"), [ref("b")]))])
+assert parse("(a) b") == File([ref("a"), ref("b")])
+assert parse("f(1, 2)(3)") == File([FunctionCall(FunctionCall(ref("f"), [number(1), number(2)]), [number(3)])])
+assert parse("-a * !b") == File([BinaryStar(UnaryMinus(ref("a")), UnaryBang(ref("b")))])
+assert parse("1 + 2 + 3 < 4 == null") == File([BinaryEquals(
+    BinaryLessThan(BinaryPlus(BinaryPlus(number(1), number(2)), number(3)), number(4)),
+    Literal(Token(TokenType.NULL, "null", None), NoneType))])
+assert parse("fun f(a) -> { if a return a else return f(a) } val b = \"s\" var c = (b)") == File([
+    FunctionDeclaration(ident("f"), [ident("a")], Block([
+        If(ref("a"), Return(ref("a")), Else(Return(FunctionCall(ref("f"), [ref("a")]))))])),
+    ValueDeclaration(ident("b"), Literal(Token(TokenType.STRING, '"s"', "s"), str)),
+    VariableDeclaration(ident("c"), ref("b"))])
+assert parse("while x { x = x - 1 }") == File([While(ref("x"), Block([VariableAssignment(ident("x"), BinaryMinus(ref("x"), number(1)))]))])
+
+assert isinstance(Parser.FileParser(tokens("val = 1"), 0), ConsumeError)
+
+# precedence climbing: operators of one level chain left to right, tighter levels nest on the right as well.
+assert parse("1 + 2 - 3") == File([BinaryMinus(BinaryPlus(number(1), number(2)), number(3))])
+assert parse("1 - 2 * 3 + 4") == File([BinaryPlus(BinaryMinus(number(1), BinaryStar(number(2), number(3))), number(4))])
+assert parse("a < b == c >= d") == File([BinaryEquals(BinaryLessThan(ref("a"), ref("b")), BinaryGreaterEquals(ref("c"), ref("d")))])
+assert parse("a | b & c == d % 2") == File([BinaryOr(ref("a"), BinaryAnd(ref("b"), BinaryEquals(ref("c"), BinaryPercent(ref("d"), number(2)))))])
+assert isinstance(Parser.FileParser(tokens("1 + * 2"), 0), ConsumeError)
+
+# punctuation, keywords and identifiers are shared between occurrences (and both lexers), nodes have no __dict__
+import CompiledLexer
+a1, plus1, a2, plus2, fun1 = tokens("a + a + fun")
+a3, plus3, fun2 = CompiledLexer.TokenLexer("a+fun", 0).parsed
+assert a1 is a2 is a3 and plus1 is plus2 is plus3 and fun1 is fun2
+assert not hasattr(parse("a + 1").stmts[0], "__dict__") and not hasattr(a1, "__dict__")
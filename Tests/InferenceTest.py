@@ -0,0 +1,72 @@
+from types import NoneType
+
+import ClosureCompiler
+import Linker
+from DataTypes.Nodes import *
+from Programs import link, run
+
+
+def fails(source, scope=None) -> str | None:
+    try:
+        link(source, scope)
+    except Exception as e:
+        return str(e)
+
+def types(tree) -> list:
+    """the types of the expressions in tree that have one, in order."""
+    found = [tree.type] if isinstance(tree, Node) and hasattr(tree, "type") and not isinstance(tree, Literal) else []
+    return found + [t for child in children(tree) for t in types(child)]
+
+def value_type(source, index=-1):
+    """the type of what the declaration at index in the file declares."""
+    return link(source).stmts[index].value.type
+
+
+# through vals and vars, in any order they are written in
+assert value_type("val a = 1 val b = a * 2 + 1 val c = b") is int
+assert value_type("val a = 'x' val b = a + a") is str
+assert value_type("val a = 7 / 2") is float
+assert value_type("val a = 1 < 2") is bool
+assert value_type("val a = true + 1") is int
+assert value_type("var i = 0 while i < 10 i = i + 1 val j = i") is int
+assert value_type("var i = 0 i = 'x' val j = i") is None
+assert types(link("var i = 0 var s = '' while i < 3 { s = s + 'x' i = i + 1 }")) == [bool, int, str, str, int, int]
+
+# arguments from the calls by name, and what functions return
+assert value_type("fun fib(n) -> { if n < 2 return n return fib(n - 1) + fib(n - 2) } val r = fib(15)") is int
+assert value_type("fun f(a, b) -> { return a + b } val r = f('x', 'y')") is str
+assert value_type("fun f(a) -> { return a } f(1) val r = f('x')") is None # called with both
+assert value_type("fun f(a) -> { if a return 1 } val r = f(true)") is None # can end without a return
+assert value_type("fun f() -> { return } val r = f()") is NoneType
+assert value_type("fun h(n) -> { return n * 2 } fun g() -> { return h(1) + 1 } val r = g()") is int
+match link("fun f(a) -> { return a + 1 } val g = f val r = g(1)"): # f is passed on, it could be called with anything
+    case File([FunctionDeclaration(_, _, Block([Return(BinaryPlus(Reference(_, _, None), _, None))])), _, ValueDeclaration(_, FunctionCall(_, _, None))]): pass
+    case other: assert False, other
+match link("var x = 1 fun f() -> { return x + 1 }"): # the next file could assign x before f runs
+    case File([_, FunctionDeclaration(_, _, Block([Return(BinaryPlus(Reference(_, _, None), _, None))]))]): pass
+    case other: assert False, other
+
+# operators on types they don't take are errors while linking, whether they would run or not
+assert fails("'a' - 1") == "Type error: unsupported operand type(s) for -: 'str' and 'int'."
+assert fails("if false { val a = null < 1 }") is not None
+assert fails("val a = -'a'") is not None
+assert fails("val s = 'a' var n = 1 val r = s * n + 1") is not None
+assert fails("fun f(n) -> { return n - 1 } val r = f('a')") is not None
+assert fails("fun f() -> { return 'a' } val r = f() * 2 - 1") is not None
+assert fails("fun f(n) -> { return n - 1 } val g = f g('a')") is None # only at runtime
+assert fails("fun f(n) -> { return n - 1 }") is None # never called
+assert fails("var a = 1 a = 'x' val b = a - 1") is None # not always the same
+assert fails("val a = '%d' % 5") is None and fails("val a = '%s' % 'x'") is None # formatting, depends on the string
+assert value_type("val a = '%d' % 5") is str
+assert fails("val a = 1 << -1") is None and fails("val a = 1 / 0") is None # only the values are wrong
+assert fails("val a = 'a' % null") is None
+
+# slots of files linked before are not known, they might hold anything by now
+scope = Linker.global_scope()
+link("var a = 's'", scope)
+assert fails("val b = a + 'x' a = 1", scope) is None
+assert fails("val c = a - 1", scope) is None
+
+# the int fast paths are built while compiling, Programs.py checks they give the same results
+run(ClosureCompiler.evaluate, "val a = 1 val b = a + 1")
+assert ClosureCompiler.int_operator.cache_info().currsize > 0
@@ -0,0 +1,81 @@
+import ClosureCompiler
+import CompiledLexer
+import Evaluator
+import Interpreter
+import Linker
+import Parser
+from DataTypes.Nodes import *
+from Programs import link, run
+
+def reads(source):
+    """the reads of every function declared in source, by name."""
+    result = {}
+    def walk(tree):
+        if isinstance(tree, FunctionDeclaration):
+            result[tree.name.lexeme] = tree.reads
+        for child in (getattr(tree, name) for name in getattr(tree, "__match_args__", ())):
+            for node in (child if isinstance(child, list) else [child]):
+                if isinstance(node, Node):
+                    walk(node)
+    walk(link(source))
+    return result
+
+# pure: only arguments, locals, outer vals and pure functions
+assert reads("fun fib(n) -> { if n < 2 return n return fib(n - 1) + fib(n - 2) }") == { "fib": [(1, 1)] }
+assert reads("val k = 2 fun f(a) -> { var b = a * k b = b + 1 return b }") == { "f": [(1, 1)] }
+assert reads("fun f(a) -> a fun g(a) -> { return f(a) }") == { "f": [], "g": [(1, 1)] }
+assert reads("fun outer(a) -> { fun inner() -> { return a } return inner() }")["inner"] == []
+# and what the pure functions they call read
+assert reads("val k = 1 fun g() -> { return k } fun f(x) -> { return g() + x }")["f"] == [(1, 2), (1, 1)]
+assert reads("val k = 1 fun g() -> { return k } fun h() -> { return g() } fun f() -> { return h() }")["f"] == [(1, 3), (1, 2), (1, 1)]
+# impure: outer vars, assignments to them, unknown callees and declaring closures
+assert reads("var k = 2 fun f(a) -> { return a * k }") == { "f": None }
+assert reads("var n = 0 fun f() -> { n = n + 1 }") == { "f": None }
+assert reads("fun apply(f, a) -> { return f(a) }") == { "apply": None }
+assert reads("var n = 0 fun f() -> { n = 1 } fun g() -> { f() }") == { "f": None, "g": None }
+assert reads("fun counter() -> { var n = 0 fun next() -> { n = n + 1 return n } return next }")["counter"] is None
+
+fib = "fun fib(n) -> { if n < 2 return n return fib(n - 1) + fib(n - 2) } val r = fib(80)"
+for evaluate in [Evaluator.evaluate, ClosureCompiler.evaluate]:
+    Evaluator.memo.clear()
+    assert run(evaluate, fib)[1][-1] == 23416728348467685 # exponential without the memo
+    assert (Evaluator.memo.hits, Evaluator.memo.misses) == (78, 81), Evaluator.memo.report()
+
+# results depend on the values of outer vals, and are told apart from equal python values
+programs = [
+    "val k = 2 fun f(a) -> { return a * k } val x = f(3) val k = 5 val r = x + f(3)",
+    "fun make(k) -> { fun f(a) -> { return a + k } return f } val f = make(1) val g = make(2) val r = f(1) * 10 + g(1)",
+    "fun f(a) -> { return a } val x = f(1) val r = f(true)",
+    "fun f(a) -> { return a } val x = f(1) val r = f(1.0 + 0)",
+    "fun f(a) -> { if a > 1 return 1 / 0 return a } val r = f(0) f(2)",
+    "val k = 1 fun g() -> { return k } fun f(x) -> { return g() + x } var a = f(0) val k = 2 var b = f(0) val r = a * 10 + b",
+]
+for program in programs:
+    Evaluator.memo.enabled = False
+    expected = run(Evaluator.evaluate, program)
+    Evaluator.memo.enabled = True
+    for evaluate in [Evaluator.evaluate, ClosureCompiler.evaluate]:
+        result = run(evaluate, program)
+        assert result == expected and type(result[1][-1]) is type(expected[1][-1]), (program, result, expected)
+
+# the same across the lines of the REPL
+for evaluator in [Evaluator.evaluate, ClosureCompiler.evaluate]:
+    Evaluator.memo.clear()
+    interpreter = Interpreter.Interpreter(CompiledLexer.TokenLexer, Parser.FileParser, Linker.resolve, evaluator)
+    for line in ["val k = 1", "fun g() -> { return k }", "fun f(x) -> { return g() + x }", "f(0)", "val k = 2"]:
+        interpreter.interpret(line)
+    assert interpreter.interpret("f(0)") == 2
+
+# bounded, least recently used entries go first
+memo = Evaluator.Memo(size=2)
+square = link("fun square(a) -> { return a * a }").stmts[0]
+frame = Linker.global_frame()
+Evaluator.evaluate(frame, File([square], 2))
+for a in [1, 2, 1, 3, 1]:
+    assert memo.call(frame[1], Linker.call_frame(frame[1], [a]), Evaluator.run_call) == a * a
+assert (memo.hits, memo.misses, len(memo.entries)) == (2, 3, 2)
+
+# functions that never hit are given up on
+Evaluator.memo.clear()
+run(ClosureCompiler.evaluate, "fun add(a, b) -> { return a + b } var i = 0 while i < 1000 i = add(i, 1)")
+assert Evaluator.memo.misses == Evaluator.memo.patience
@@ -0,0 +1,75 @@
+import Evaluator
+import Linker
+import Optimizer
+from DataTypes.Nodes import *
+from Programs import link
+
+programs = [
+    open("sample.bang").read(),
+    "1 + 2 * 3 - 4 % 3",
+    "!(1 < 2) == (3 >= 4)",
+    "(1 << 4 >> 2 | 1) & 7",
+    "'con' + \"cat\"",
+    "true & !false",
+    "7 / 2",
+    "1 / 0",
+    "1 << -1",
+    "1 << 1000",
+    "val a = 1 + 1 val b = a * 3",
+    "while 0 1",
+    "while false { val a = 1 }",
+    "if 1 < 2 3 else 4",
+    "if 1 > 2 3",
+    "if 1 > 2 { val a = 3 } else { val a = 4 }",
+    "val a = 2 var b = a if a == 2 b = 3",
+    "var a = 1 a = 2 val b = a",
+    "val a = 1 { val a = 2 } val b = a",
+    "fun fib(n) -> { if n < 2 return n else return fib(n - 1) + fib(n - 2) } val f = fib(15)",
+    "fun f() -> { return 1 val a = 2 } val r = f()",
+    "fun f() -> { val a = 3 fun g() -> { return a * 2 } return g() } val r = f()",
+    "val x = 1 fun f() -> { return x } fun g() -> { val x = 2 return f() } val r = g()",
+    "fun counter() -> { var n = 0 fun next() -> { n = n + 1 return n } return next } val c = counter() c() val r = c()",
+    "var x = 3 var s = 0 while x > 0 { s = s + x x = x - 1 }",
+]
+
+
+def run(source, optimizer=None):
+    frame, linked = Linker.global_frame(), link(source)
+    if optimizer is not None:
+        linked = optimizer(linked)
+    try:
+        result = Evaluator.evaluate(frame, linked)
+    except Exception as e:
+        result = f"{type(e).__name__}: {e}"
+    # functions hold their (optimized) bodies, only what they evaluate to has to be the same
+    return result, ["<function>" if isinstance(value, Linker.FunctionCallable) else value for value in frame]
+
+for program in programs:
+    assert run(program) == run(program, Optimizer.PassManager()), program
+
+optimize = lambda source: Optimizer.PassManager()(link(source))
+
+# folding
+assert optimize("1 + 2 * 3").stmts == [Optimizer.literal(7)]
+assert optimize("!(1 < 2)").stmts == [Optimizer.literal(False)]
+assert optimize("true").stmts[0].value.literal is True
+assert isinstance(optimize("1 / 0").stmts[0], BinarySlash)
+
+# vals are propagated, vars are not
+match optimize("val a = 2 var b = a * 3 b = a + b"):
+    case File([_, VariableDeclaration(_, Literal(six, _), _), VariableAssignment(_, BinaryPlus(Literal(two, _), Reference()), _)]):
+        assert (six.literal, two.literal) == (6, 2)
+    case other:
+        assert False, other
+
+# dead branches and code after return
+assert optimize("if 1 > 2 { val a = 3 } val b = 4").stmts[0] == optimize("val a = 3 val b = 4").stmts[1]
+assert optimize("while false 1 val b = 4").stmts == optimize("val b = 4").stmts
+match optimize("fun f() -> { return 1 val a = 2 }"):
+    case File([FunctionDeclaration(_, _, Block([Return(_)]), _, _)]): pass
+    case other: assert False, other
+
+manager = Optimizer.PassManager()
+manager(link("if 1 + 1 == 2 { val a = 1 } else { val a = 2 }"))
+assert manager.removed["constant folding"] == 4 and manager.removed["dead branches"] > 0, manager.removed
+assert "dead branches" in manager.report()
@@ -0,0 +1,40 @@
+import CompiledLexer
+import Parser
+import ParallelParser
+from Consumers.Consumer import ConsumeSuccess, ConsumeError
+from DataTypes.Nodes import File
+
+sources = [
+    open("sample.bang").read(),
+    "fun f(a) -> { val b = a var c = (b) { val d = 1 } } f(1) val g = 2 g(f(2)) var h = 3 { fun i() -> 1 }",
+    " ".join(f"val v{i} = v{i - 1} * 2 + ({i} - 1) fun f{i}(a) -> {{ if a return v{i} return f{i}(a - 1) }}" for i in range(1, 200)),
+]
+
+if __name__ == "__main__": # the workers import this module where processes are spawned instead of forked
+    parser = ParallelParser.FileParser(workers=2, size=16)
+    for source in sources:
+        tokens = CompiledLexer.TokenLexer(source, 0).parsed
+        assert len(ParallelParser.pieces(tokens, 16)) > 1
+        expected = Parser.FileParser(tokens, 0)
+        match parser(tokens, 0):
+            case ConsumeSuccess([], File(stmts) as parsed, progress):
+                assert parsed == expected.parsed and progress == expected.progress == len(tokens)
+            case other:
+                assert False, other
+
+    # errors in any declaration, at their position in the whole file
+    tokens = CompiledLexer.TokenLexer(sources[2].replace("val v150 = ", "val v150 = ="), 0).parsed
+    match parser(tokens, 0):
+        case ConsumeError(rest, _, progress) as error:
+            assert tokens[progress].lexeme == "=" and tokens[progress - 2].lexeme == "v150", error.description
+            assert rest[0] is tokens[progress]
+        case other:
+            assert False, other
+    # the sequential parser stops in front of it without an error
+    assert isinstance(Parser.FileParser(tokens, 0), ConsumeSuccess)
+
+    # small files are parsed right away, without starting workers
+    small = ParallelParser.FileParser(workers=2)
+    tokens = CompiledLexer.TokenLexer(sources[1], 0).parsed
+    assert small(tokens, 0) == Parser.FileParser(tokens, 0) and small.executor is None
+    assert isinstance(small([], 0), ConsumeError)
@@ -0,0 +1,46 @@
+import itertools
+
+import Evaluator
+import Linker
+import Profiler
+from Programs import link
+
+source = ("fun fib(n) -> { if n < 2 return n return fib(n - 1) + fib(n - 2) } "
+          "fun sum(n, acc) -> { if n == 0 return acc return sum(n - 1, acc + n) } "
+          "val r = fib(10) + sum(50, 0)")
+Evaluator.memo.enabled = False
+
+original = Evaluator.evaluate
+ticks = itertools.count()
+with Profiler.Profiler(clock=lambda: next(ticks)) as profiler:
+    assert Evaluator.evaluate == profiler.evaluate
+    frame = Linker.global_frame()
+    profiler.run(frame, link(source))
+assert Evaluator.evaluate is original
+assert frame[-1] == 55 + 1275
+
+# tail calls are calls too, they just don't nest
+functions = profiler.functions
+assert (functions["fib"].count, functions["sum"].count, functions["<file>"].count) == (177, 51, 1)
+assert profiler.nodes["FunctionCall"].count == 177 + 1 # only the first call of sum is not a tail call
+assert profiler.nodes["File"].count == 1
+
+# the exclusive times add up to everything, inclusive times count recursion once
+total = functions["<file>"].inclusive
+assert sum(entry.exclusive for entry in functions.values()) == total
+assert sum(entry.exclusive for entry in profiler.nodes.values()) <= total # less the bookkeeping between them
+assert all(entry.exclusive <= entry.inclusive <= total for entry in [*functions.values(), *profiler.nodes.values()])
+
+lines = profiler.collapsed().splitlines()
+assert "<file>;sum " in "\n".join(lines) and "<file>;fib;fib;fib " in "\n".join(lines)
+assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == total * 1_000_000
+assert profiler.report().splitlines()[1].startswith("fib")
+
+# pure functions are not memoized while profiling, every call is counted
+Evaluator.memo.enabled = True
+Evaluator.memo.clear()
+with Profiler.Profiler() as profiler:
+    assert not Evaluator.memo.enabled
+    profiler.run(Linker.global_frame(), link("fun fib(n) -> { if n < 2 return n return fib(n - 1) + fib(n - 2) } val r = fib(15)"))
+assert Evaluator.memo.enabled and Evaluator.memo.hits == 0
+assert profiler.functions["fib"].count == 1973 and profiler.nodes["BinaryMinus"].count == 2 * (1973 - 987)
@@ -0,0 +1,66 @@
+import ClosureCompiler
+import CompiledLexer
+import Evaluator
+import Linker
+import Parser
+import VM
+
+evaluators = [Evaluator.evaluate, ClosureCompiler.evaluate, VM.evaluate]
+
+programs = [
+    open("sample.bang").read(),
+    "1 + 2 * 3 - 4 % 3",
+    "!(1 < 2) == (3 >= 4)",
+    "(1 << 4 >> 2 | 1) & 7",
+    "'con' + \"cat\"",
+    "null",
+    "7 / 2",
+    "val a = 1",
+    "while 0 1",
+    "fun fib(n) -> { if n < 2 return n else return fib(n - 1) + fib(n - 2) } val f = fib(15)",
+    "var x = 5 var s = 0 while x > 0 x = x - 1",
+    "fun f() -> { return } val a = f()",
+    "fun f() -> { } val a = f()",
+    "fun f(a) -> { val b = a * 2 { val c = b + 1 return c } } var r = f(4)",
+    "fun outer(a) -> { fun inner() -> { return a } return inner() } val r = outer(1)",
+    "fun f(a, b) -> { if a > b return a return b } val r = f(1, 2) val q = f(3, 2)",
+    "fun f(a) -> { if a return 1 else { return 2 } } val r = f(0)",
+    "fun f(a) -> { var b = a while b > 0 if b < 3 return b else b = b - 1 } val r = f(5) val q = f(0)",
+    "fun f(a) -> a f(1, 2)",
+    "fun f(a, b) -> a f(1)",
+    "val a = 1 a(2)",
+    "fun f(a) -> { return 1 + a } val g = f g(\"a\")",
+    "var x = 3 var s = 0 while x > 0 { s = s + x x = x - 1 }",
+    "var x = 1 { var x = 2 x = 3 } val y = x",
+    "fun counter() -> { var n = 0 fun next() -> { n = n + 1 return n } return next } val c = counter() c() val r = c()",
+    "val x = 1 fun f() -> { return x } fun g() -> { val x = 2 return f() } val r = g()",
+    "return 1",
+    "if 1 { return 2 } val a = 3",
+    "fun f(a) -> { var b = a while b > 0 { if b < 3 { return b } b = b - 1 } } val r = f(0) val q = f(7)",
+    # operands of known types take the int fast paths
+    "var i = 0 var s = 0 while i < 100 { s = s + i * i % 7 - (i >> 1) + (i << 2) i = i + 1 } val r = s",
+    "val a = 7 val b = 2 val c = a / b val d = a % b val e = a == b val f = a != b val g = a <= b val h = a > b val i = a & b val j = a | b",
+    "val a = 1 val r = a << 200",
+    "val a = 5 val b = 0 val r = a / b",
+    "val a = 1 val b = -1 val r = a << b",
+    "fun f(a, b) -> { var c = a while c < b c = c + 3 return c } val r = f(1, 100)",
+]
+
+
+def link(source, scope=None):
+    return Linker.resolve(Linker.global_scope() if scope is None else scope, Parser.FileParser(CompiledLexer.TokenLexer(source, 0).parsed, 0).parsed)
+
+def run(evaluate, source):
+    """what evaluating source gives, or the error it raised, and the frame it ran in."""
+    frame = Linker.global_frame()
+    try:
+        return evaluate(frame, link(source)), frame
+    except Exception as e:
+        return f"{type(e).__name__}: {e}", frame
+
+
+if __name__ == "__main__":
+    for program in programs:
+        expected = run(Evaluator.evaluate, program)
+        for evaluate in evaluators[1:]:
+            assert run(evaluate, program) == expected, (evaluate.__module__, program)
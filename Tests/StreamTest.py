@@ -0,0 +1,57 @@
+import io
+
+import CompiledLexer
+import Evaluator
+import Interpreter
+import Lexer
+import Linker
+import Parser
+from Consumers.Consumer import ConsumeError, ConsumeSuccess
+from DataTypes.Nodes import File
+
+sources = [
+    open("sample.bang").read(),
+    "a \"b c\" d // x\n e //",
+    "a<=b<<c//d\n'e' 12_3ab",
+    "fun f(a) -> { val b = a var c = (b) { val d = 1 } } f(1) val g = (a) -> { var h = 2 } g(f(2))",
+]
+
+for source in sources:
+    expected = Lexer.TokenLexer(source, 0).parsed
+    for chunk_size in [1, 2, 3, 5, 64]:
+        assert list(CompiledLexer.stream(io.StringIO(source), chunk_size)) == expected, (source, chunk_size)
+
+def returned(generator):
+    """what generator returns after yielding everything."""
+    while True:
+        try:
+            next(generator)
+        except StopIteration as done:
+            return done.value
+
+assert returned(CompiledLexer.stream(io.StringIO(sources[0]), 2)) is None
+for source, error in [("x $ y", "Cannot tokenize '$' @ 2."), (" lead", "Cannot tokenize ' ' @ 0."), ("", "Input is empty.")]:
+    match returned(CompiledLexer.stream(io.StringIO(source), 2)):
+        case ConsumeError() as e: assert e.description == error, e
+        case other: assert False, (source, other)
+
+# the interpreter returns the error, what comes before the declaration that was cut short has run
+runner = Interpreter.Interpreter(CompiledLexer.TokenLexer, Parser.FileParser, Linker.resolve, Evaluator.evaluate)
+match runner.interpret_stream(CompiledLexer.stream(io.StringIO("val a = 1 val b = 2 $ val c = 3"), 4)):
+    case ConsumeError() as e: assert e.description == "Cannot tokenize '$' @ 20." and runner.eval_frame[1:] == [1], (e, runner.eval_frame)
+    case other: assert False, other
+assert runner.interpret_stream(CompiledLexer.stream(io.StringIO("$"))).description == "Cannot tokenize '$' @ 0."
+assert runner.interpret_stream(CompiledLexer.stream(io.StringIO("1 + 2"))) == 3
+
+# parsing the file one declaration at a time gives the same statements
+for source in [sources[0], sources[3]]:
+    tokens = Lexer.TokenLexer(source, 0).parsed
+    statements = []
+    for start, chunk in Parser.declarations(iter(tokens)):
+        match Parser.FileParser(chunk, start):
+            case ConsumeSuccess([], File(stmts), progress):
+                assert progress == start + len(chunk)
+                statements += stmts
+    assert File(statements) == Parser.FileParser(tokens, 0).parsed
+
+assert [start for start, _ in Parser.declarations(Lexer.TokenLexer(sources[3], 0).parsed)] == [0, 28]
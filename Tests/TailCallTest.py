@@ -0,0 +1,33 @@
+import Linker
+from DataTypes.Nodes import *
+from Programs import evaluators, link
+
+# only calls returned from functions are tail calls
+match link("fun f(n) -> { if n == 0 return f(0) return f(n - 1) } return f(1)"):
+    case File([FunctionDeclaration(_, _, Block([If(_, Return(TailCall()), _), Return(TailCall())]), _, _), Return(call)]):
+        assert type(call) is FunctionCall
+    case other:
+        assert False, other
+
+match link("fun f(n) -> { return 1 + f(n) }"):
+    case File([FunctionDeclaration(_, _, Block([Return(BinaryPlus(_, call))]), _, _)]):
+        assert type(call) is FunctionCall
+    case other:
+        assert False, other
+
+programs = [
+    # far deeper than the python recursion limit
+    ("fun sum(n, acc) -> { if n == 0 return acc return sum(n - 1, acc + n) } val r = sum(100000, 0)", 5000050000),
+    ("var odd = null fun even(n) -> { if n == 0 return true else return odd(n - 1) } "
+     "fun odd_(n) -> { if n == 0 return false return even(n - 1) } odd = odd_ val r = even(50001)", False),
+    # every call still gets its own frame, closures keep theirs
+    ("fun f(n, g) -> { fun h() -> { return n } if n == 0 return g() return f(n - 1, h) } val r = f(3, 0)", 1),
+    ("fun id(a) -> a fun f() -> { return id(1) } val r = f()", None),
+    ("fun id(a) -> { return a } fun f() -> { return id(1) } val r = f()", 1),
+]
+
+for evaluate in evaluators:
+    for program, expected in programs:
+        frame = Linker.global_frame()
+        evaluate(frame, link(program))
+        assert frame[-1] == expected, (evaluate.__module__, program, frame[-1])
@@ -0,0 +1,42 @@
+import itertools
+
+import CompiledLexer
+import Lexer
+import Parser
+from Consumers.Consumer import Consume, ConsumeSuccess
+from Consumers.StringConsumers import char
+from Consumers.Trace import Trace
+
+# memo hits: the memoized a runs once per position inside .packrat(), the second alternative gets its result from the table
+a = char("a").memo()
+twice = ((a + char("b")) | (a + char("c"))).packrat()
+with Trace(a=a, twice=twice) as trace:
+    assert twice("ac", 0) == ConsumeSuccess("", ["a", "c"], 2)
+assert (trace.rules["a"].calls, trace.rules["a"].memo_hits, trace.rules["a"].memo_misses) == (2, 1, 1)
+assert (trace.rules["twice"].calls, trace.rules["twice"].failures) == (1, 0)
+
+# failures and the positions they backtrack over: (a) is parsed as arguments up to the missing ->
+tokens = CompiledLexer.TokenLexer("val x = (a) + 1", 0).parsed
+untraced = Parser.FileParser(tokens, 0)
+consume = Parser.ExpressionParser.consume
+with Trace(Parser) as trace:
+    assert Parser.FileParser(tokens, 0) == untraced
+assert Parser.ExpressionParser.consume is consume # nothing is left behind
+rules = trace.rules
+assert rules["FileParser"].calls == 1 and rules["FileParser"].failures == 0
+assert (rules["AnonFunctionParser"].failures, rules["AnonFunctionParser"].backtracked) == (2, 3)
+assert rules["PrimaryParser"].calls == 4
+
+# the lexer rules, every SimpleTokenLexer by its name. at the end of the input all of them run once for their errors
+ticks = itertools.count()
+with Trace(Lexer, clock=lambda: next(ticks), TokenLexer=Lexer.TokenLexer) as trace:
+    assert Lexer.TokenLexer("a <= 12", 0).parsed == CompiledLexer.TokenLexer("a <= 12", 0).parsed
+rules = trace.rules
+assert (rules["LessEqualsLexer"].calls, rules["LessEqualsLexer"].failures) == (2, 1)
+assert (rules["LeftShiftLexer"].calls, rules["LeftShiftLexer"].backtracked) == (2, 1) # '<' matched, '=' did not
+assert rules["TokenLexer"].calls == 1
+assert sum(rule.exclusive for rule in rules.values()) == rules["TokenLexer"].inclusive
+
+report = trace.report().splitlines()
+assert report[0].split()[:4] == ["rule", "calls", "failed", "backtracked"]
+assert report[1].startswith("TokenLexer") and len(report) == 1 + sum(1 for rule in rules.values() if rule.calls)
@@ -0,0 +1,29 @@
+import Bytecode
+import VM
+from Programs import link, run
+
+# calls do not recurse in python
+assert run(VM.evaluate, "fun down(n) -> { if n == 0 return 0 return down(n - 1) } val r = down(5000)")[1][2] == 0
+
+listing = Bytecode.disassemble(Bytecode.compile_file(link("fun f(a) -> a f(2)")))
+assert listing.splitlines() == [
+    "<file>:",
+    "     0 FUNCTION         0 (fun f)",
+    "     2 STORE_LOCAL      1 (f)",
+    "     4 LOAD_LOCAL       1 (f)",
+    "     6 CHECK            1 (1 arguments)",
+    "     8 CONST            2 (2)",
+    "    10 CALL             1 (1 arguments)",
+    "    12 POP",
+    "    14 CONST            3 (None)",
+    "    16 END",
+    "",
+    "f:",
+    "     0 LOAD_LOCAL       1 (a)",
+    "     2 POP",
+    "     4 CONST            0 (None)",
+    "     6 RETURN",
+], listing
+
+# names of enclosing functions are addressed through the frame chain
+assert "     0 LOAD             0 (n @ (1, 1))" in Bytecode.disassemble(Bytecode.compile_file(link("fun f() -> { var n = 0 fun g() -> { return n } }"))).splitlines()
@@ -0,0 +1,143 @@
+# Runs the code Bytecode.py compiles. One loop over the instruction array with an explicit operand stack and call stack,
+# so calls in bang neither recurse in python nor need exceptions to return.
+# Results are identical to Evaluator.evaluate, Tests/VMTest.py compares the two.
+
+import sys
+
+import Bytecode
+from Bytecode import Code, Op
+from DataTypes.Nodes import UnaryOperators, BinaryOperators
+from Evaluator import ReturnException
+from Linker import FunctionCallable
+
+CONST, LOAD_LOCAL, STORE_LOCAL, LOAD, STORE, POP, UNARY, BINARY, JUMP, JUMP_IF_FALSE, FUNCTION, CHECK, CALL, RETURN, END, TAIL_CALL = (op.value for op in Op)
+
+Unaries = [UnaryOperators[node] for node in Bytecode.Unaries]
+Binaries = [BinaryOperators[node] for node in Bytecode.Binaries]
+
+
+def code_of(function: FunctionCallable) -> Code:
+    """the compiled body of a function, compiling it first if another backend created it."""
+    if function.code is None:
+        function.code = Bytecode.compile_function("<function>", function.slots, function.body, function.size)
+    return function.code
+
+
+def run(code: Code, frame: list, budget=None):
+    steps = execute(code, frame, budget=budget)
+    try:
+        while True:
+            next(steps) # without an interval it never yields, this only gets the result out of the StopIteration
+    except StopIteration as done:
+        return done.value
+
+
+def pause(budget, interval: int | None, steps: int, calls: list, frame: list):
+    """what execute does every few steps: charge them to the budget, and yield if it has an interval.
+    returns the number of steps until the next pause."""
+    until = interval or budget.interval
+    if budget is not None:
+        until = budget.charge(steps, calls, frame, until)
+    if interval:
+        yield
+    return until
+
+
+def execute(code: Code, frame: list, interval: int | None = None, budget=None):
+    """a generator running code in frame that yields after every interval jumps back (loops) and calls, so whoever drives
+    it can do something else in between (see Interpreter.interpret_async). it never yields without one.
+    with a Budget.Budget the steps, calls and memory are charged to it, which raises once the script goes over.
+    returns the result, as the value of its StopIteration."""
+    stack, calls = [], [] # calls hold what run was doing in the callers
+    push, pop = stack.append, stack.pop
+    instructions, constants, addresses, pc = code.instructions, code.constants, code.addresses, 0
+    frame.extend([None] * (code.size - len(frame)))
+    max_depth = sys.maxsize if budget is None or budget.depth is None else budget.depth
+    countdown = steps = -1 if budget is None and not interval else (yield from pause(budget, interval, 0, calls, frame))
+    while True:
+        op, arg = instructions[pc], instructions[pc + 1]
+        pc += 2
+
+        # roughly ordered by how often they run
+        if op == LOAD_LOCAL:
+            push(frame[arg])
+        elif op == CONST:
+            push(constants[arg])
+        elif op == BINARY:
+            right = pop()
+            stack[-1] = Binaries[arg](stack[-1], right)
+        elif op == JUMP_IF_FALSE:
+            if not pop(): pc = arg
+        elif op == JUMP:
+            if arg < pc:
+                countdown -= 1
+                if not countdown:
+                    countdown = steps = yield from pause(budget, interval, steps, calls, frame)
+            pc = arg
+        elif op == STORE_LOCAL:
+            frame[arg] = pop()
+        elif op == LOAD:
+            depth, slot = addresses[arg]
+            outer = frame
+            for _ in range(depth):
+                outer = outer[0]
+            push(outer[slot])
+        elif op == STORE:
+            depth, slot = addresses[arg]
+            outer = frame
+            for _ in range(depth):
+                outer = outer[0]
+            outer[slot] = pop()
+        elif op == POP:
+            pop()
+        elif op == CHECK:
+            function = stack[-1]
+            if not isinstance(function, FunctionCallable):
+                raise Exception(f"Illegal callee: {constants[arg][0]}")
+            la, ls = constants[arg][1], len(function.slots)
+            if la < ls: raise Exception(f"Not enough arguments given, expected {ls}, got {la}")
+            if la > ls: raise Exception(f"Too many arguments given, expected {ls}, got {la}")
+        elif op == CALL:
+            countdown -= 1
+            if not countdown:
+                countdown = steps = yield from pause(budget, interval, steps, calls, frame)
+            if len(calls) >= max_depth:
+                budget.exceed("depth", steps - countdown, calls, frame)
+            function = stack[-arg - 1]
+            callee = [function.frame, *stack[len(stack) - arg:]]
+            callee.extend([None] * (function.size - arg - 1))
+            del stack[-arg - 1:]
+            calls.append((instructions, constants, addresses, pc, frame))
+            code = code_of(function)
+            instructions, constants, addresses, pc, frame = code.instructions, code.constants, code.addresses, 0, callee
+        elif op == TAIL_CALL:
+            # the frame and instructions of the current function are not needed anymore, so nothing goes on calls
+            countdown -= 1
+            if not countdown:
+                countdown = steps = yield from pause(budget, interval, steps, calls, frame)
+            function = stack[-arg - 1]
+            callee = [function.frame, *stack[len(stack) - arg:]]
+            callee.extend([None] * (function.size - arg - 1))
+            del stack[-arg - 1:]
+            code = code_of(function)
+            instructions, constants, addresses, pc, frame = code.instructions, code.constants, code.addresses, 0, callee
+        elif op == RETURN:
+            if not calls:
+                if budget is not None:
+                    budget.steps_used += steps - countdown # the steps since the last pause
+                raise ReturnException(value= pop())
+            instructions, constants, addresses, pc, frame = calls.pop()
+        elif op == FUNCTION:
+            template = constants[arg]
+            push(FunctionCallable(template.slots, template.body, code=template.code, size=template.size, frame=frame))
+        elif op == UNARY:
+            stack[-1] = Unaries[arg](stack[-1])
+        elif op == END:
+            if budget is not None:
+                budget.steps_used += steps - countdown
+            return pop()
+
+
+def evaluate(frame, tree, budget=None):
+    """same interface as Evaluator.evaluate, so it can be passed to the Interpreter instead."""
+    return run(Bytecode.compile_file(tree), frame, budget)